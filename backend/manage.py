@@ -0,0 +1,159 @@
+"""Maintenance commands for the School Admin Panel backend.
+
+Run from the backend directory, e.g. ``python manage.py migrate-media``.
+"""
+import asyncio
+import gzip
+import re
+from pathlib import Path
+from typing import Optional
+
+import typer
+
+import server
+
+cli = typer.Typer(help="School Admin Panel maintenance commands")
+
+
+@cli.callback()
+def main():
+    """School Admin Panel maintenance commands"""
+
+
+MEDIA_COLLECTIONS = ["news", "gallery", "school_info"]
+
+
+async def _migrate_media(batch_size: int, dry_run: bool):
+    inline_image = {
+        "image": {
+            "$nin": [None, ""],
+            "$not": re.compile(r"^(/api/media/|https?://)"),
+        }
+    }
+    for name in MEDIA_COLLECTIONS:
+        collection = server.db[name]
+        migrated = 0
+        cursor = collection.find(inline_image, {"_id": 0, "id": 1, "image": 1}).batch_size(batch_size)
+        async for doc in cursor:
+            if not dry_run:
+                try:
+                    reference = await server.externalize_image(doc["image"], read_back=True)
+                except server.HTTPException as e:
+                    typer.echo(f"  {name}/{doc['id']}: skipped ({e.detail})")
+                    continue
+                await collection.update_one({"id": doc["id"]}, {"$set": {"image": reference}})
+            migrated += 1
+        typer.echo(f"{name}: {'would migrate' if dry_run else 'migrated'} {migrated} documents")
+    if server.image_tasks:
+        typer.echo(f"Waiting for {len(server.image_tasks)} image variant jobs...")
+        await asyncio.wait(server.image_tasks)
+
+
+@cli.command("migrate-media")
+def migrate_media(
+    batch_size: int = typer.Option(100, help="Documents fetched per cursor batch"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only count documents with inline images"),
+):
+    """Move inline base64 images into the media store and rewrite documents to reference them."""
+    asyncio.run(_migrate_media(batch_size, dry_run))
+
+
+
+async def _build_variants():
+    # Variants stored before they were tagged would otherwise get variants of their own
+    originals = server.db.media.find({"variants": {"$exists": True, "$ne": {}}}, {"_id": 0, "hash": 1, "variants": 1})
+    async for media in originals:
+        hashes = [variant["hash"] for variant in media["variants"].values()]
+        await server.db.media.update_many(
+            {"hash": {"$in": hashes}, "variant_of": {"$exists": False}}, {"$set": {"variant_of": media["hash"]}}
+        )
+
+    pending = server.db.media.find(
+        {"variants": {"$exists": False}, "variant_of": {"$exists": False}, "content_type": {"$regex": "^image/"}},
+        {"_id": 0, "hash": 1},
+    )
+    built = 0
+    async for media in pending:
+        await server.build_image_variants(media["hash"])
+        built += 1
+    typer.echo(f"Built variants for {built} media files")
+
+
+@cli.command("build-variants")
+def build_variants():
+    """Render thumb/medium/full variants for stored images that don't have them yet."""
+    asyncio.run(_build_variants())
+
+
+
+async def _indexes(apply: bool):
+    plan = await server.index_plan()
+    for name, diff in plan.items():
+        typer.echo(f"{name}:")
+        for index in diff["missing"]:
+            typer.echo(f"  missing  {index.document['name']}")
+        for index_name in diff["extra"]:
+            typer.echo(f"  {'replaced' if index_name in diff['replaced_text'] else 'extra':<8} {index_name}")
+
+        # $indexStats counters reset on server restart, so "unused" is relative to `since`
+        async for stats in server.db[name].aggregate([{"$indexStats": {}}]):
+            if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                typer.echo(f"  unused   {stats['name']} (no ops since {stats['accesses']['since']:%Y-%m-%d %H:%M})")
+    if apply:
+        await server.ensure_indexes()
+        typer.echo("Missing indexes created")
+
+
+@cli.command("indexes")
+def indexes(apply: bool = typer.Option(False, "--apply", help="Create missing indexes")):
+    """Report declared indexes that are missing, undeclared ones, and indexes with no recorded use."""
+    asyncio.run(_indexes(apply))
+
+
+async def _file_chunks(path: Path, chunk_size: int = 1 << 16):
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+async def _import(path: Path, collection: server.BulkCollection, format: server.ImportFormat, batch_size: int, author: str):
+    target = server.BULK_TARGETS[collection]
+    if target["create"] is None:
+        raise typer.BadParameter(f"{target['label']} cannot be imported", param_hint="--collection")
+    user = await server.db.users.find_one({"email": author}, {"_id": 0, "id": 1})
+    if user is None:
+        raise typer.BadParameter(f"no user with email {author}", param_hint="--author")
+
+    lines = server.iter_lines(_file_chunks(path))
+    rows = server.parse_csv(lines) if format == server.ImportFormat.CSV else server.parse_ndjson(lines)
+    result = await server.import_rows(target, rows, user["id"], batch_size)
+    typer.echo(
+        f"{result.rows} rows: {result.inserted} inserted, {result.updated} updated, {result.failed} failed "
+        f"in {result.seconds:.1f}s ({result.rows_per_second:.0f} rows/s)"
+    )
+    for error in result.errors:
+        typer.echo(f"  row {error.row}{f' ({error.id})' if error.id else ''}: {error.error}")
+    if result.failed > len(result.errors):
+        typer.echo(f"  ... and {result.failed - len(result.errors)} more")
+    if server.image_tasks:
+        await asyncio.wait(server.image_tasks)
+
+
+@cli.command("import")
+def import_file(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="NDJSON or CSV file, optionally gzipped"),
+    collection: server.BulkCollection = typer.Option(..., help="Collection to upsert into"),
+    format: Optional[server.ImportFormat] = typer.Option(None, help="Defaults to the file extension"),
+    batch_size: int = typer.Option(server.IMPORT_BATCH_SIZE, help="Rows per bulk_write"),
+    author: str = typer.Option("admin@school.com", help="Author of imported news that has no author_id"),
+):
+    """Upsert documents by id from an NDJSON or CSV export, streaming the file in batches."""
+    if format is None:
+        suffixes = path.suffixes[-2:] if path.suffix == ".gz" else path.suffixes[-1:]
+        format = server.ImportFormat.CSV if ".csv" in suffixes else server.ImportFormat.NDJSON
+    asyncio.run(_import(path, collection, format, batch_size, author))
+
+
+if __name__ == "__main__":
+    cli()
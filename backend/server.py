@@ -1,29 +1,326 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response, status, File, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo import ASCENDING, DESCENDING, TEXT, DeleteOne, IndexModel, InsertOne, ReturnDocument, UpdateOne
+from pymongo import monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
+import re
+import sys
+import asyncio
+import binascii
+import bisect
+import codecs
+import csv
+import hashlib
+import hmac
+import io
+import json
 import logging
+import math
+import threading
+import time
+import zlib
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import List, Optional, Dict, Any, Union
+from urllib.parse import quote, urlencode
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 import jwt
 from passlib.context import CryptContext
 import base64
 from enum import Enum
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+import orjson
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis is optional; the response cache falls back to in-process storage
+    aioredis = None
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
+logger = logging.getLogger(__name__)
+
+# Metrics: a small in-process registry served on /metrics in the Prometheus text format
+# Scrapes must send METRICS_TOKEN as a bearer token; without one /metrics is refused
+# unless METRICS_PUBLIC=true explicitly exposes it (e.g. behind a private network)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+METRICS_PUBLIC = os.environ.get("METRICS_PUBLIC", "false").lower() == "true"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+METRICS = []
+
+class Metric:
+    """A counter, gauge or histogram keyed by label values"""
+
+    def __init__(self, kind: str, name: str, help: str, labels=(), buckets=None):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {} if labels else {(): self.initial()}
+        # Mongo command events arrive on Motor's executor threads
+        self.lock = threading.Lock()
+        METRICS.append(self)
+
+    def initial(self):
+        return [[0] * (len(self.buckets) + 1), 0.0] if self.kind == "histogram" else 0
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels):
+        self.inc(*labels, amount=-1)
+
+    def observe(self, value: float, *labels):
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = self.initial()
+            # Buckets are upper bounds (le), so the first bound >= value takes the sample
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            values = [(labels, [list(v[0]), v[1]] if self.kind == "histogram" else v) for labels, v in self.values.items()]
+        for labels, value in sorted(values):
+            pairs = [f'{name}="{escape_label(label)}"' for name, label in zip(self.labels, labels)]
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{format_labels(pairs)} {value}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+                cumulative += count
+                bucket_labels = format_labels(pairs + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(pairs)} {total}")
+            lines.append(f"{self.name}_count{format_labels(pairs)} {cumulative}")
+        return lines
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(pairs: List[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+http_requests = Metric("counter", "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"))
+http_request_seconds = Metric(
+    "histogram", "http_request_duration_seconds", "HTTP request latency", ("method", "route"), LATENCY_BUCKETS
+)
+http_response_bytes = Metric(
+    "histogram", "http_response_size_bytes", "HTTP response body size", ("method", "route"), SIZE_BUCKETS
+)
+http_in_flight = Metric("gauge", "http_requests_in_flight", "HTTP requests currently being handled")
+phase_seconds = Metric(
+    "histogram", "app_phase_duration_seconds",
+    "Time spent in request phases (jwt_decode, user_lookup, validation, serialization)", ("phase",), PHASE_BUCKETS
+)
+mongo_command_seconds = Metric(
+    "histogram", "mongodb_command_duration_seconds", "MongoDB command round trips", ("command", "collection"), PHASE_BUCKETS
+)
+
+@contextmanager
+def timed(phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase_seconds.observe(time.perf_counter() - started, phase)
+
+def command_collection(event) -> str:
+    target = event.command.get(event.command_name)
+    # getMore carries the cursor id in the command field and the collection separately
+    return target if isinstance(target, str) else event.command.get("collection", "")
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Time every command the driver sends, labelled by command and collection"""
+
+    def __init__(self):
+        self.collections = {}
+
+    def started(self, event):
+        self.collections[(event.connection_id, event.request_id)] = command_collection(event)
+
+    def succeeded(self, event):
+        self.finish(event)
+
+    def failed(self, event):
+        self.finish(event)
+
+    def finish(self, event):
+        collection = self.collections.pop((event.connection_id, event.request_id), "")
+        mongo_command_seconds.observe(event.duration_micros / 1e6, event.command_name, collection)
+
+# Slow query log: commands slower than SLOW_QUERY_MS are logged and aggregated by shape
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_MAX_SHAPES = int(os.environ.get("SLOW_QUERY_MAX_SHAPES", "200"))
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "queryPlanner")  # explain verbosity, or "off"
+SLOW_QUERY_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Session, cluster and concern fields that explain rejects or doesn't need
+EXPLAIN_DROP_FIELDS = {"lsid", "txnNumber", "readConcern", "writeConcern", "autocommit", "startTransaction"}
+
+def query_shape(value):
+    """Replace literal values with "?" so queries that differ only in values share a shape"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]  # $and / $or clauses
+    return "?"
+
+def command_shape(command_name: str, command: dict) -> dict:
+    if command_name == "find":
+        return {"filter": query_shape(command.get("filter", {})), "sort": command.get("sort")}
+    if command_name in ("count", "distinct", "findAndModify"):
+        return {"filter": query_shape(command.get("query", {})), "sort": command.get("sort")}
+    if command_name in ("update", "delete"):
+        # Bulk writes send many statements; the first stands for the batch
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return {"filter": query_shape(statements[0].get("q", {})), "sort": None}
+    pipeline = command.get("pipeline", [])
+    match = pipeline[0]["$match"] if pipeline and "$match" in pipeline[0] else {}
+    sort = next((stage["$sort"] for stage in pipeline if "$sort" in stage), None)
+    return {"filter": query_shape(match), "sort": sort, "pipeline": [next(iter(stage)) for stage in pipeline]}
+
+def plan_summary(plan: dict) -> str:
+    """Compact winning plan, e.g. "LIMIT > FETCH > IXSCAN status_1_created_at_-1_id_-1" """
+    plan = plan.get("queryPlan", plan)
+    label = plan.get("stage", "?") + (f" {plan['indexName']}" if plan.get("indexName") else "")
+    if plan.get("inputStage"):
+        return f"{label} > {plan_summary(plan['inputStage'])}"
+    if plan.get("inputStages"):
+        return f"{label}({', '.join(plan_summary(stage) for stage in plan['inputStages'])})"
+    return label
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Aggregate slow commands by shape and capture explain output the first time a shape is seen"""
+
+    def __init__(self, threshold_ms: float, max_shapes: int):
+        self.threshold_ms = threshold_ms
+        self.max_shapes = max_shapes
+        self.pending = {}
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.loop = None  # set at startup; explains run there since events arrive on driver threads
+
+    def started(self, event):
+        if event.command_name in SLOW_QUERY_COMMANDS:
+            # Succeeded/failed events carry neither the command nor the database, so keep them here
+            self.pending[(event.connection_id, event.request_id)] = (
+                event.command, command_collection(event), event.database_name
+            )
+
+    def succeeded(self, event):
+        self.finish(event)
+
+    def failed(self, event):
+        self.finish(event)
+
+    def finish(self, event):
+        started = self.pending.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or duration_ms < self.threshold_ms:
+            return
+        command, collection, database = started
+        shape = command_shape(event.command_name, command)
+        key = json.dumps([event.command_name, collection, shape], sort_keys=True, default=str)
+        now = datetime.utcnow()
+        with self.lock:
+            entry = self.entries.get(key)
+            first = entry is None
+            if first:
+                if len(self.entries) >= self.max_shapes:
+                    del self.entries[min(self.entries, key=lambda k: self.entries[k]["total_ms"])]
+                entry = self.entries[key] = {
+                    "command": event.command_name, "collection": collection, **shape,
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0, "first_seen": now,
+                    "plan": None, "explain": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_ms"] = duration_ms
+            entry["last_seen"] = now
+        logger.warning(
+            "Slow %s on %s (%.1f ms): filter=%s sort=%s",
+            event.command_name, collection, duration_ms, json.dumps(shape["filter"], default=str), shape["sort"],
+        )
+        if first and SLOW_QUERY_EXPLAIN != "off" and self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.capture_explain(entry, database, command), self.loop)
+
+    async def capture_explain(self, entry: dict, database: str, command: dict):
+        explainable = {
+            field: value for field, value in command.items()
+            if not field.startswith("$") and field not in EXPLAIN_DROP_FIELDS
+        }
+        # explain accepts a single write statement; the shape came from the first one
+        for field in ("updates", "deletes"):
+            if field in explainable:
+                explainable[field] = explainable[field][:1]
+        try:
+            result = await client[database].command({"explain": explainable, "verbosity": SLOW_QUERY_EXPLAIN})
+        except Exception as e:
+            entry["explain"] = {"error": str(e)}
+            return
+        # Aggregations that aren't pushed down wholesale report the planner under their $cursor stage
+        planner = result.get("queryPlanner") or next(
+            (stage["$cursor"]["queryPlanner"] for stage in result.get("stages", []) if "$cursor" in stage), {}
+        )
+        entry["explain"] = planner.get("winningPlan")
+        if entry["explain"]:
+            entry["plan"] = plan_summary(entry["explain"])
+
+    def top(self, limit: int, sort_by: str) -> List[dict]:
+        with self.lock:
+            entries = [dict(entry) for entry in self.entries.values()]
+        entries.sort(key=lambda entry: entry[sort_by], reverse=True)
+        return [{**entry, "mean_ms": entry["total_ms"] / entry["count"]} for entry in entries[:limit]]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_MAX_SHAPES)
+mongo_listeners = [MongoCommandMetrics(), slow_query_log]
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=mongo_listeners)
 db = client[os.environ['DB_NAME']]
 
+# Media storage (content-addressed by SHA-256)
+MEDIA_BACKEND = os.environ.get("MEDIA_BACKEND", "disk")  # disk or gridfs
+MEDIA_ROOT = Path(os.environ.get("MEDIA_ROOT", ROOT_DIR / "media"))
+MEDIA_URL_PREFIX = "/api/media/"
+media_bucket = AsyncIOMotorGridFSBucket(db, bucket_name="media")
+
+# Image variants (longest side in pixels), rendered off the event loop
+IMAGE_VARIANTS = {"thumb": 320, "medium": 960, "full": 2048}
+IMAGE_QUALITY = int(os.environ.get("IMAGE_QUALITY", "80"))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+image_pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image-variants")
+image_tasks = set()
+# Variant jobs holding image bytes at once; the rest wait before reading their blob
+image_slots = asyncio.Semaphore(IMAGE_WORKERS * 2)
+
 # Create the main app without a prefix
 app = FastAPI(title="School Admin Panel API", version="1.0.0")
 
@@ -32,9 +329,79 @@ api_router = APIRouter(prefix="/api")
 
 # Security
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+optional_security = HTTPBearer(auto_error=False)
+# Changing BCRYPT_ROUNDS makes existing hashes "need update"; they are rehashed on next login
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "30"))
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", "300"))
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "1024"))
+
+# bcrypt runs on its own pool so a burst of logins can't stall the event loop
+PASSWORD_WORKERS = int(os.environ.get("PASSWORD_WORKERS", "4"))
+PASSWORD_QUEUE_LIMIT = int(os.environ.get("PASSWORD_QUEUE_LIMIT", "0"))  # 0 = unbounded
+password_pool = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password-hashing")
+password_slots = asyncio.Semaphore(PASSWORD_WORKERS)
+password_stats = {"queued": 0, "running": 0, "completed": 0, "rejected": 0, "max_queued": 0}
+
+# Public response cache
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "512"))
+CONTENT_VERSION_TTL = float(os.environ.get("CONTENT_VERSION_TTL", "5"))
+REDIS_URL = os.environ.get("REDIS_URL")
+
+# Reads trust stored documents and encode them straight to JSON; set
+# STRICT_READ_VALIDATION=true to run them through the response models again
+STRICT_READ_VALIDATION = os.environ.get("STRICT_READ_VALIDATION", "false").lower() == "true"
+
+# Site statistics are materialized in site_counters and periodically recounted
+STATS_RECONCILE_INTERVAL = float(os.environ.get("STATS_RECONCILE_INTERVAL", "3600"))
+background_tasks = set()
+
+BULK_MAX_OPERATIONS = int(os.environ.get("BULK_MAX_OPERATIONS", "1000"))
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ERRORS = int(os.environ.get("IMPORT_MAX_ERRORS", "100"))  # row errors listed in the report
+
+# On-demand profiling of the event-loop thread (POST /api/debug/profile)
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "60"))
+
+# Full-text search
+SEARCH_LANGUAGE = os.environ.get("SEARCH_LANGUAGE", "russian")
+SEARCH_SNIPPET_LENGTH = 200
+
+# Visit tracking: beacons are buffered in memory and flushed as one bulk write
+VISIT_BUFFER_SIZE = int(os.environ.get("VISIT_BUFFER_SIZE", "10000"))
+VISIT_FLUSH_INTERVAL = float(os.environ.get("VISIT_FLUSH_INTERVAL_MS", "5000")) / 1000
+VISIT_FLUSH_BATCH = int(os.environ.get("VISIT_FLUSH_BATCH", "500"))
+visit_buffer = deque(maxlen=VISIT_BUFFER_SIZE)
+# Each tracked path becomes a field of the day's rollup document, so only known public
+# routes get their own counter; a trailing "/*" folds everything below a route into it
+# and any other path is counted under "other"
+VISIT_PATHS = [path.strip() for path in os.environ.get("VISIT_PATHS", "/,/admin,/admin/login,/admin/news").split(",") if path.strip()]
+visit_flush_needed = asyncio.Event()
+visit_stats = {"received": 0, "dropped": 0, "flushed": 0, "flushes": 0, "failed": 0}
+
+# Unique visitors are estimated with one HyperLogLog sketch per day (2**14 one-byte
+# registers = 16 KiB, ~0.8% standard error). Changing the precision invalidates stored sketches.
+HLL_PRECISION = 14
+UNIQUE_VISITORS_TTL = float(os.environ.get("UNIQUE_VISITORS_TTL", "60"))
+
+# Cache-Control per public resource, overridable with CACHE_CONTROL_<NAME>
+CACHE_CONTROL = {
+    name: os.environ.get(f"CACHE_CONTROL_{name.upper()}", default)
+    for name, default in {
+        "school_info": "public, no-cache",
+        "contacts": "public, no-cache",
+        "gallery": "public, no-cache",
+        "schedule": "public, no-cache",
+        "news": "private, no-cache",
+        "home": "public, no-cache",
+    }.items()
+}
 
 # Enums
 class UserRole(str, Enum):
@@ -47,6 +414,25 @@ class NewsStatus(str, Enum):
     PUBLISHED = "published"
     ARCHIVED = "archived"
 
+class ImageSize(str, Enum):
+    THUMB = "thumb"
+    MEDIUM = "medium"
+    FULL = "full"
+    ORIGINAL = "original"
+
+class SlowQuerySort(str, Enum):
+    TOTAL = "total_ms"
+    MAX = "max_ms"
+    COUNT = "count"
+
+class ProfileFormat(str, Enum):
+    COLLAPSED = "collapsed"  # one "frame;frame;frame count" line per stack, for flamegraph.pl or speedscope
+    JSON = "json"
+
+class ListView(str, Enum):
+    FULL = "full"
+    SUMMARY = "summary"
+
 # User Models
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -83,13 +469,24 @@ class News(BaseModel):
     title: str
     content: str
     excerpt: Optional[str] = None
-    image: Optional[str] = None  # base64 encoded
+    image: Optional[str] = None  # media URL (/api/media/{hash})
     status: NewsStatus = NewsStatus.DRAFT
     author_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     published_at: Optional[datetime] = None
 
+class NewsSummary(BaseModel):
+    id: str
+    title: str
+    excerpt: Optional[str] = None
+    image: Optional[str] = None
+    status: NewsStatus
+    author_id: str
+    created_at: datetime
+    updated_at: datetime
+    published_at: Optional[datetime] = None
+
 class NewsCreate(BaseModel):
     title: str
     content: str
@@ -132,11 +529,18 @@ class Gallery(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
     description: Optional[str] = None
-    image: str  # base64 encoded
+    image: str  # media URL (/api/media/{hash})
     category: str = "general"
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class GallerySummary(BaseModel):
+    id: str
+    title: str
+    image: str
+    category: str
+    created_at: datetime
+
 class GalleryCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -181,6 +585,13 @@ class Schedule(BaseModel):
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class ScheduleSummary(BaseModel):
+    id: str
+    title: str
+    date: datetime
+    time: str
+    location: Optional[str] = None
+
 class ScheduleCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -205,6 +616,13 @@ class Comment(BaseModel):
     is_approved: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class CommentSummary(BaseModel):
+    id: str
+    author_name: str
+    news_id: str
+    is_approved: bool
+    created_at: datetime
+
 class CommentCreate(BaseModel):
     content: str
     author_name: str
@@ -214,9 +632,110 @@ class CommentCreate(BaseModel):
 class CommentUpdate(BaseModel):
     is_approved: Optional[bool] = None
 
+class ModerationAction(str, Enum):
+    APPROVE = "approve"
+    REJECT = "reject"
+    DELETE = "delete"
+
+class CommentModeration(BaseModel):
+    action: ModerationAction
+    # Selection: all given criteria must match; at least one is required
+    ids: Optional[List[str]] = None
+    news_id: Optional[str] = None
+    author_email: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class ModerationResult(BaseModel):
+    action: ModerationAction
+    affected: int
+
+class VisitEvent(BaseModel):
+    path: str = "/"
+    visitor_id: Optional[str] = None
+
+# Bulk operation models
+class BulkCollection(str, Enum):
+    NEWS = "news"
+    GALLERY = "gallery"
+    SCHEDULE = "schedule"
+    CONTACTS = "contacts"
+    SCHOOL_INFO = "school-info"
+    COMMENTS = "comments"
+
+class ExportCollection(str, Enum):
+    USERS = "users"
+    NEWS = "news"
+    SCHOOL_INFO = "school-info"
+    GALLERY = "gallery"
+    CONTACTS = "contacts"
+    SCHEDULE = "schedule"
+    COMMENTS = "comments"
+
+class ImportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class BulkAction(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+class BulkOperation(BaseModel):
+    op: BulkAction
+    id: Optional[str] = None  # required for update and delete
+    data: Optional[Dict[str, Any]] = None  # *Create / *Update fields
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: BulkAction
+    id: Optional[str] = None
+    status: int  # HTTP-style status of this item
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    succeeded: int = 0
+    failed: int = 0
+    results: List[BulkItemResult]
+
+class ImportRowError(BaseModel):
+    row: int  # NDJSON line or CSV record (after the header), starting at 1
+    id: Optional[str] = None
+    error: str
+
+class ImportResult(BaseModel):
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[ImportRowError] = Field(default_factory=list)  # the first IMPORT_MAX_ERRORS failures
+
+class SearchResult(BaseModel):
+    type: str  # news, schedule or school_info
+    id: str
+    title: str
+    snippet: Optional[str] = None  # excerpt or the first characters of the body
+    score: float
+    status: Optional[NewsStatus] = None
+    section: Optional[str] = None
+    date: Optional[datetime] = None
+
+class HomePage(BaseModel):
+    school_info: List[SchoolInfo]
+    news: List[NewsSummary]  # published only
+    gallery: List[GallerySummary]
+    contacts: List[Contact]
+    schedule: List[ScheduleSummary]
+
 class SiteStats(BaseModel):
     total_visits: int = 0
     daily_visits: int = 0
+    unique_visitors_daily: int = 0
+    unique_visitors_weekly: int = 0
+    unique_visitors_monthly: int = 0
+    unique_visitors_error: float = 0.0  # relative standard error of the unique estimates
     total_users: int = 0
     total_news: int = 0
     total_comments: int = 0
@@ -232,6 +751,126 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+# In-process caches
+class TTLCache:
+    """Bounded LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def pop(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
+
+# Users by email (token subject), and verified tokens by digest -> subject until exp.
+# Per-process: other workers see user changes once USER_CACHE_TTL expires.
+user_cache = TTLCache(AUTH_CACHE_SIZE, USER_CACHE_TTL)
+token_cache = TTLCache(AUTH_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+class ResponseCache:
+    """Read-through cache of serialized public responses, invalidated per collection.
+
+    Keys embed the collection's content version (see content_changed), so once a write
+    bumps it a stale entry is never read again and just ages out. Concurrent misses for
+    a key share one build task. With REDIS_URL set, entries live in Redis and are
+    shared by workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, redis=None):
+        self.local = TTLCache(maxsize, ttl)
+        self.ttl = ttl
+        self.redis = redis
+        self.pending = {}
+        self.coalesced = 0
+
+    async def load(self, key: str):
+        if not self.redis:
+            return self.local.get(key)
+        raw = await self.redis.get(key)
+        if raw is None:
+            self.local.misses += 1
+            return None
+        self.local.hits += 1
+        headers, _, body = raw.partition(b"\n")
+        return body, json.loads(headers)
+
+    async def store(self, key: str, entry):
+        if not self.redis:
+            self.local.set(key, entry)
+            return
+        body, headers = entry
+        await self.redis.set(key, json.dumps(headers).encode() + b"\n" + body, ex=max(int(self.ttl), 1))
+
+    async def build_and_store(self, key: str, build):
+        entry = await build()
+        await self.store(key, entry)
+        return entry
+
+    async def get_or_build(self, namespace: str, version: str, key: str, build):
+        """Return (body, headers) for key, running build() at most once per key at a time"""
+        key = f"response:{namespace}:{version}:{key}"
+        entry = await self.load(key)
+        if entry is not None:
+            return entry
+
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self.build_and_store(key, build))
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: a disconnecting client must not cancel the build others are waiting on
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.local.stats(), "coalesced": self.coalesced, "backend": "redis" if self.redis else "memory"}
+
+def create_response_cache() -> ResponseCache:
+    redis = None
+    if REDIS_URL:
+        if aioredis is None:
+            logger.warning("REDIS_URL is set but the redis package is not installed; using in-process cache")
+        else:
+            redis = aioredis.from_url(REDIS_URL)
+    return ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, redis)
+
+response_cache = create_response_cache()
+# Content versions by namespace, so a cache hit needs no Mongo read. Writes in this
+# process refresh their entry; other workers see them once CONTENT_VERSION_TTL expires.
+version_cache = TTLCache(64, CONTENT_VERSION_TTL)
+caches = {"users": user_cache, "tokens": token_cache, "responses": response_cache, "versions": version_cache}
+
 # Authentication functions
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -239,6 +878,39 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def run_password_job(func, *args):
+    """Run a bcrypt call on password_pool, tracking how many callers are waiting for a slot"""
+    if PASSWORD_QUEUE_LIMIT and password_stats["queued"] >= PASSWORD_QUEUE_LIMIT:
+        password_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password checks, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    password_stats["queued"] += 1
+    password_stats["max_queued"] = max(password_stats["max_queued"], password_stats["queued"])
+    try:
+        await password_slots.acquire()
+    finally:
+        password_stats["queued"] -= 1
+
+    password_stats["running"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_pool, func, *args)
+    finally:
+        password_stats["running"] -= 1
+        password_stats["completed"] += 1
+        password_slots.release()
+
+async def hash_password(password: str) -> str:
+    return await run_password_job(get_password_hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: Optional[str]):
+    """Returns (valid, new_hash); new_hash is set when the stored hash uses outdated settings"""
+    return await run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -255,19 +927,37 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    token_key = hashlib.sha256(credentials.credentials.encode()).digest()
+    email = token_cache.get(token_key)
+    if email is None:
+        try:
+            with timed("jwt_decode"):
+                payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+        except jwt.PyJWTError:
             raise credentials_exception
-    except jwt.PyJWTError:
-        raise credentials_exception
+        if "exp" in payload:
+            token_cache.set(token_key, email, ttl=min(payload["exp"] - time.time(), TOKEN_CACHE_TTL))
     
-    user = await db.users.find_one({"email": email})
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        with timed("user_lookup"):
+            user_doc = await db.users.find_one({"email": email})
+        if user_doc is None:
+            raise credentials_exception
+        with timed("validation"):
+            user = User(**user_doc)
+        user_cache.set(email, user)
     
-    return User(**user)
+    return user
+
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Current user for endpoints that are public but show more to signed-in staff"""
+    if credentials is None:
+        return None
+    return await get_current_user(credentials)
 
 async def get_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
@@ -285,6 +975,621 @@ async def get_moderator_user(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
+# List projection helpers
+def requested_fields(fields: str) -> set:
+    return {field.strip() for field in fields.split(",") if field.strip()}
+
+def list_projection(model, summary_model, view: ListView, fields: Optional[str], sort_field: str):
+    """Build the Mongo projection for a list query from ?view= / ?fields="""
+    if fields:
+        requested = requested_fields(fields)
+        unknown = requested - set(model.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        # id and the sort key are always needed to build the next cursor
+        return {"_id": 0, "id": 1, sort_field: 1, **{field: 1 for field in requested}}
+    return model_projection(summary_model if view == ListView.SUMMARY else model)
+
+def select_fields(docs: List[dict], fields: str, sort_field: str) -> List[dict]:
+    """Drop the sort key from ?fields= results unless it was asked for (id is always kept)"""
+    if sort_field not in requested_fields(fields):
+        for doc in docs:
+            doc.pop(sort_field, None)
+    return docs
+
+def model_projection(model) -> dict:
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+model_defaults_cache = {}
+
+def model_defaults(model) -> dict:
+    """Plain field defaults of a read model (default factories such as ids are left out)"""
+    defaults = model_defaults_cache.get(model)
+    if defaults is None:
+        defaults = model_defaults_cache[model] = {
+            name: field.default for name, field in model.model_fields.items()
+            if not field.is_required() and field.default_factory is None
+        }
+    return defaults
+
+def read_documents(docs: List[dict], model):
+    """Documents projected to a read model; re-validated only under STRICT_READ_VALIDATION.
+
+    Without validation, fields missing from older documents still get their model
+    default, so the response has the same shape either way.
+    """
+    if STRICT_READ_VALIDATION:
+        with timed("validation"):
+            return [model(**doc) for doc in docs]
+    defaults = model_defaults(model)
+    if not defaults:
+        return docs
+    return [{**defaults, **doc} if defaults.keys() - doc.keys() else doc for doc in docs]
+
+def json_response(payload, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Encode with orjson and bypass FastAPI's response_model serialization"""
+    return Response(content=encode_json(payload), media_type="application/json", headers=headers)
+
+# Keyset pagination helpers
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(doc: dict, sort_field: str) -> str:
+    payload = json.dumps([doc[sort_field].isoformat(), doc["id"]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, last_id = json.loads(payload)
+        return datetime.fromisoformat(value), str(last_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def paginate(
+    collection,
+    query: dict,
+    projection: Optional[dict],
+    sort_field: str,
+    direction: int,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+):
+    """Fetch one page ordered by (sort_field, id); returns the docs and the next cursor.
+
+    With a cursor the page starts right after the last seen (sort_field, id) pair,
+    so deep pages cost the same as the first one. skip is kept for older clients.
+    """
+    sort = [(sort_field, direction), ("id", direction)]
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        op = "$gt" if direction == ASCENDING else "$lt"
+        after = {"$or": [{sort_field: {op: value}}, {sort_field: value, "id": {op: last_id}}]}
+        query = {"$and": [query, after]} if query else after
+        skip = 0
+
+    docs = await collection.find(query, projection).sort(sort).skip(skip).limit(limit).to_list(limit)
+    next_cursor = None
+    if limit and len(docs) == limit:
+        next_cursor = encode_cursor(docs[-1], sort_field)
+    return docs, next_cursor
+
+def next_cursor_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+# Content versions: bumped on every write to a public collection, shared by all workers
+async def content_versions(namespaces: List[str]) -> Dict[str, dict]:
+    versions = {name: version_cache.get(name) for name in namespaces}
+    missing = [name for name, version in versions.items() if version is None]
+    if missing:
+        found = {doc["_id"]: doc async for doc in db.content_versions.find({"_id": {"$in": missing}})}
+        for name in missing:
+            versions[name] = found.get(name, {"_id": name, "version": 0, "updated_at": None})
+            version_cache.set(name, versions[name])
+    return versions
+
+async def content_changed(namespace: str):
+    version = await db.content_versions.find_one_and_update(
+        {"_id": namespace},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    version_cache.set(namespace, version)
+
+# Conditional GET helpers
+def validator_headers(namespace: str, etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL[namespace]}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the current validators"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        # HTTP dates have one-second resolution
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+# Response cache helpers
+def encode_json_default(value):
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def encode_json(payload) -> bytes:
+    with timed("serialization"):
+        return orjson.dumps(payload, default=encode_json_default)
+
+async def cached_json_response(request: Request, namespace: str, build, sources: Optional[List[str]] = None):
+    """Serve a public GET from response_cache; build() returns (payload, headers).
+
+    The content versions of `sources` (default: just `namespace`) double as the ETag,
+    so a matching conditional request gets a 304 without building anything.
+    """
+    versions = await content_versions(sources or [namespace])
+    version = ".".join(str(versions[name]["version"]) for name in sources or [namespace])
+    updated_at = max((v["updated_at"] for v in versions.values() if v["updated_at"]), default=None)
+    etag = f'"{namespace}-{version}"'
+    headers = validator_headers(namespace, etag, updated_at)
+    if not_modified(request, etag, updated_at):
+        return Response(status_code=304, headers=headers)
+
+    async def render():
+        payload, extra_headers = await build()
+        return encode_json(payload), extra_headers
+
+    key = f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+    body, extra_headers = await response_cache.get_or_build(namespace, version, key, render)
+    return Response(content=body, media_type="application/json", headers={**extra_headers, **headers})
+
+# Update helpers
+def build_update(update_data: dict, computed: Optional[dict] = None):
+    """Build the update document for $set-style edits; None when there is nothing to change"""
+    if computed:
+        # Pipeline update: plain values are wrapped so strings starting with "$" stay literal
+        return [{"$set": {**{field: {"$literal": value} for field, value in update_data.items()}, **computed}}]
+    if update_data:
+        return {"$set": update_data}
+    return None
+
+async def update_by_id(
+    collection,
+    doc_id: str,
+    update_data: dict,
+    not_found: str,
+    scope: Optional[dict] = None,
+    computed: Optional[dict] = None,
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+):
+    """Apply update_data to one document in a single round trip and return it as updated
+    (or as it was, with return_document=ReturnDocument.BEFORE).
+
+    scope narrows the match (e.g. to the caller's own articles); if the document exists
+    but falls outside it, the caller gets a 403 instead of a 404. computed holds
+    aggregation expressions evaluated against the document as it was before the update.
+    """
+    query = {"id": doc_id, **(scope or {})}
+    update = build_update(update_data, computed)
+    if update is None:
+        doc = await collection.find_one(query)
+    else:
+        doc = await collection.find_one_and_update(query, update, return_document=return_document)
+    if doc is None:
+        raise await update_target_error(collection, doc_id, not_found, scope)
+    return doc
+
+async def update_target_error(collection, doc_id: str, not_found: str, scope: Optional[dict]) -> HTTPException:
+    if scope and await collection.find_one({"id": doc_id}, {"_id": 1}):
+        return HTTPException(status_code=403, detail="Not enough permissions")
+    return HTTPException(status_code=404, detail=not_found)
+
+async def check_update_target(collection, doc_id: str, not_found: str, scope: Optional[dict] = None):
+    """Fail the way update_by_id would before doing side work (e.g. storing an upload) for it"""
+    if await collection.find_one({"id": doc_id, **(scope or {})}, {"_id": 1}) is None:
+        raise await update_target_error(collection, doc_id, not_found, scope)
+
+# Site counter functions
+SITE_COUNTERS_ID = "site"
+
+async def bump_site_counters(**deltas: int):
+    """Atomically adjust the materialized totals served by /api/stats"""
+    await db.site_counters.update_one({"_id": SITE_COUNTERS_ID}, {"$inc": deltas}, upsert=True)
+
+async def reconcile_site_counters() -> dict:
+    """Recount the totals from the collections and overwrite any drift"""
+    total_users, total_news, total_comments, pending_comments = await asyncio.gather(
+        db.users.count_documents({}),
+        db.news.count_documents({}),
+        db.comments.count_documents({}),
+        db.comments.count_documents({"is_approved": False}),
+    )
+    actual = {
+        "total_users": total_users,
+        "total_news": total_news,
+        "total_comments": total_comments,
+        "pending_comments": pending_comments,
+    }
+    current = await db.site_counters.find_one({"_id": SITE_COUNTERS_ID}) or {}
+    drift = {key: value - current.get(key, 0) for key, value in actual.items() if value != current.get(key, 0)}
+    if drift and current:
+        logger.warning("Corrected site counter drift: %s", drift)
+    await db.site_counters.update_one(
+        {"_id": SITE_COUNTERS_ID},
+        {"$set": {**actual, "reconciled_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    return actual
+
+async def reconcile_site_counters_periodically():
+    while True:
+        try:
+            await reconcile_site_counters()
+        except Exception:
+            logger.exception("Site counter reconciliation failed")
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+
+# Unique visitor sketches
+class HyperLogLog:
+    """HyperLogLog cardinality sketch over a fixed-size register array.
+
+    Sketches of the same precision merge by register-wise max, so daily sketches
+    combine into weekly/monthly estimates without keeping any visitor IDs.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is not None and len(registers) != self.size:
+            raise ValueError("Register array does not match the sketch precision")
+        self.registers = bytearray(registers if registers is not None else self.size)
+
+    def add(self, value: str):
+        hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(self.size)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+async def merge_visitor_sketch(day: str, sketch: HyperLogLog, attempts: int = 5):
+    """Fold a sketch into the day's stored registers (compare-and-swap on hll_version)"""
+    for _ in range(attempts):
+        rollup = await db.visit_rollups.find_one({"_id": day}, {"hll": 1, "hll_version": 1})
+        if rollup and "hll_version" in rollup:
+            version = rollup["hll_version"]
+            expected = version
+        else:
+            # Rollups written before sketches existed have no version yet
+            version, expected = 0, {"$exists": False}
+        if rollup and rollup.get("hll"):
+            sketch.merge(HyperLogLog(registers=rollup["hll"]))
+        result = await db.visit_rollups.update_one(
+            {"_id": day, "hll_version": expected},
+            {"$set": {"hll": sketch.to_bytes(), "hll_version": version + 1}},
+        )
+        if result.modified_count:
+            return
+    logger.warning("Gave up merging unique visitors for %s after %d conflicting writes", day, attempts)
+
+def unique_visitor_estimates(rollups: List[dict], today: datetime) -> Dict[str, int]:
+    """Estimate unique visitors for today, the last 7 days and the last 30 days"""
+    windows = {"daily": 1, "weekly": 7, "monthly": 30}
+    sketches = {name: HyperLogLog() for name in windows}
+    for rollup in rollups:
+        if not rollup.get("hll"):
+            continue
+        day_sketch = HyperLogLog(registers=rollup["hll"])
+        age = (today - rollup["date"]).days
+        for name, days in windows.items():
+            if age < days:
+                sketches[name].merge(day_sketch)
+    return {name: sketch.estimate() for name, sketch in sketches.items()}
+
+unique_visitor_cache = {}  # day -> (estimates, expires_at)
+
+async def cached_unique_visitor_estimates(today: datetime) -> Dict[str, int]:
+    """Unique visitor estimates, recomputed off the event loop at most every UNIQUE_VISITORS_TTL seconds"""
+    cached = unique_visitor_cache.get(today)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    rollups = await db.visit_rollups.find(
+        {"date": {"$gt": today - timedelta(days=30)}}, {"hll": 1, "date": 1}
+    ).to_list(31)
+    estimates = await asyncio.get_running_loop().run_in_executor(None, unique_visitor_estimates, rollups, today)
+    unique_visitor_cache.clear()
+    unique_visitor_cache[today] = (estimates, time.monotonic() + UNIQUE_VISITORS_TTL)
+    return estimates
+
+# Visit tracking functions
+def visit_day(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+def visit_path_key(path: str) -> str:
+    """Map a client-reported path onto a known route, usable as a Mongo field name"""
+    path = re.split(r"[?#]", path, 1)[0].rstrip("/") or "/"
+    for route in VISIT_PATHS:
+        if route == path or (route.endswith("/*") and (path + "/").startswith(route[:-1])):
+            # '.' and '$' are reserved in field names
+            return quote(route, safe="/*").replace(".", "%2E")
+    return "other"
+
+def record_visit(event: VisitEvent, visitor_id: str):
+    if len(visit_buffer) == visit_buffer.maxlen:
+        visit_stats["dropped"] += 1
+    visit_buffer.append((visit_day(datetime.utcnow()), visit_path_key(event.path), visitor_id))
+    visit_stats["received"] += 1
+    if len(visit_buffer) >= VISIT_FLUSH_BATCH:
+        visit_flush_needed.set()
+
+async def flush_visits():
+    """Fold buffered visits into per-day rollups with a single bulk_write"""
+    if not visit_buffer:
+        return
+    events = list(visit_buffer)
+    visit_buffer.clear()
+
+    per_day = {}
+    sketches = {}
+    for day, path_key, visitor_id in events:
+        paths = per_day.setdefault(day, {})
+        paths[path_key] = paths.get(path_key, 0) + 1
+        sketches.setdefault(day, HyperLogLog()).add(visitor_id)
+
+    operations = [
+        UpdateOne(
+            {"_id": day},
+            {
+                "$inc": {"total": sum(paths.values()), **{f"paths.{key}": count for key, count in paths.items()}},
+                "$setOnInsert": {"date": datetime.strptime(day, "%Y-%m-%d"), "hll_version": 0},
+            },
+            upsert=True,
+        )
+        for day, paths in per_day.items()
+    ]
+    try:
+        await db.visit_rollups.bulk_write(operations, ordered=False)
+    except Exception:
+        # Put the events back in front of anything recorded meanwhile, as far as the buffer allows
+        kept = events[max(len(events) - (visit_buffer.maxlen - len(visit_buffer)), 0):]
+        visit_buffer.extendleft(reversed(kept))
+        visit_stats["dropped"] += len(events) - len(kept)
+        visit_stats["failed"] += len(events)
+        raise
+    try:
+        await bump_site_counters(total_visits=len(events))
+        for day, sketch in sketches.items():
+            await merge_visitor_sketch(day, sketch)
+    except Exception:
+        visit_stats["failed"] += len(events)
+        raise
+    visit_stats["flushed"] += len(events)
+    visit_stats["flushes"] += 1
+
+async def flush_visits_periodically():
+    while True:
+        try:
+            await asyncio.wait_for(visit_flush_needed.wait(), VISIT_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        visit_flush_needed.clear()
+        try:
+            await flush_visits()
+        except Exception:
+            logger.exception("Flushing visits failed")
+
+# Media storage functions
+MEDIA_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+# Only raster formats browsers can't execute are stored or served inline
+MEDIA_CONTENT_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+MEDIA_SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "default-src 'none'; sandbox",
+}
+
+def sniff_content_type(data: bytes) -> Optional[str]:
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def is_media_reference(value: Optional[str]) -> bool:
+    return not value or value.startswith((MEDIA_URL_PREFIX, "http://", "https://"))
+
+def decode_image_payload(value: str):
+    """Split a data URL or bare base64 string into raw bytes and a content type.
+
+    The type declared in a data URL is ignored: it comes from the client, and the
+    blob is served back from the API origin.
+    """
+    if value.startswith("data:"):
+        value = value.partition(",")[2]
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Image must be a base64 string or data URL")
+    content_type = sniff_content_type(data)
+    if content_type is None:
+        raise HTTPException(status_code=400, detail="Image must be a PNG, JPEG, GIF or WebP file")
+    return data, content_type
+
+def media_path(media_hash: str) -> Path:
+    return MEDIA_ROOT / media_hash[:2] / media_hash
+
+def write_media_file(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+async def store_media(data: bytes, content_type: str, variant_of: Optional[str] = None) -> str:
+    """Store a blob once under its SHA-256 digest and return the digest"""
+    media_hash = hashlib.sha256(data).hexdigest()
+    if await db.media.find_one({"hash": media_hash}, {"_id": 1}):
+        return media_hash
+
+    if MEDIA_BACKEND == "gridfs":
+        try:
+            await media_bucket.upload_from_stream_with_id(media_hash, media_hash, data)
+        except DuplicateKeyError:
+            pass
+    else:
+        path = media_path(media_hash)
+        if not path.exists():
+            await asyncio.to_thread(write_media_file, path, data)
+
+    await db.media.update_one(
+        {"hash": media_hash},
+        {"$setOnInsert": {
+            "hash": media_hash,
+            "content_type": content_type,
+            "size": len(data),
+            "backend": MEDIA_BACKEND,
+            "created_at": datetime.utcnow(),
+            **({"variant_of": variant_of} if variant_of else {}),
+        }},
+        upsert=True,
+    )
+    return media_hash
+
+async def read_media(media: dict) -> bytes:
+    if media.get("backend", "disk") == "gridfs":
+        stream = await media_bucket.open_download_stream(media["hash"])
+        return await stream.read()
+    return await asyncio.to_thread(media_path(media["hash"]).read_bytes)
+
+def render_image_variants(data: bytes) -> Dict[str, bytes]:
+    """Resize and recompress an image into every configured variant (runs in image_pool)"""
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = {}
+    for name, max_side in IMAGE_VARIANTS.items():
+        variant = image.copy()
+        variant.thumbnail((max_side, max_side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, "WEBP", quality=IMAGE_QUALITY, method=4)
+        variants[name] = buffer.getvalue()
+    return variants
+
+async def build_image_variants(media_hash: str, data: Optional[bytes] = None):
+    media = await db.media.find_one({"hash": media_hash})
+    if (not media or "variants" in media or media.get("variant_of")
+            or media["content_type"] not in MEDIA_CONTENT_TYPES):
+        return
+    loop = asyncio.get_running_loop()
+    async with image_slots:
+        if data is None:
+            data = await read_media(media)
+        try:
+            rendered = await loop.run_in_executor(image_pool, render_image_variants, data)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            # Record the failure so the image is served as-is and never picked up again
+            logger.warning("Cannot render variants for %s: %s", media_hash, e)
+            await db.media.update_one({"hash": media_hash}, {"$set": {"variants": {}, "variant_error": str(e)}})
+            return
+
+    variants = {}
+    for name, variant_data in rendered.items():
+        # Never serve a "smaller" variant that is heavier than the original
+        if len(variant_data) >= media["size"]:
+            continue
+        variant_hash = await store_media(variant_data, "image/webp", variant_of=media_hash)
+        variants[name] = {
+            "hash": variant_hash,
+            "content_type": "image/webp",
+            "size": len(variant_data),
+            "backend": MEDIA_BACKEND,
+        }
+    await db.media.update_one({"hash": media_hash}, {"$set": {"variants": variants}})
+
+def schedule_image_variants(media_hash: str, data: Optional[bytes] = None):
+    """Render variants in the background so the request never waits on Pillow"""
+    async def run():
+        try:
+            await build_image_variants(media_hash, data)
+        except Exception:
+            logger.exception("Failed to build image variants for %s", media_hash)
+
+    task = asyncio.create_task(run())
+    image_tasks.add(task)
+    task.add_done_callback(image_tasks.discard)
+    return task
+
+def bare_media_url(value: str) -> str:
+    """A media URL without any query or fragment (e.g. the ?size= that list endpoints add)"""
+    return re.split(r"[?#]", value, 1)[0]
+
+async def externalize_image(value: Optional[str], read_back: bool = False) -> Optional[str]:
+    """Replace an inline base64 image with a reference to the media store.
+
+    References to the store are reduced to their bare /api/media/<hash> form, so an
+    image URL echoed back from a list response is stored as the same reference.
+    Bulk producers (imports, migrations) pass read_back=True so the queued variant job
+    reads the blob back when it runs instead of holding the decoded bytes until then.
+    """
+    if value and value.startswith(MEDIA_URL_PREFIX):
+        reference = bare_media_url(value)
+        if not MEDIA_HASH_RE.match(reference[len(MEDIA_URL_PREFIX):]):
+            raise HTTPException(status_code=400, detail="Invalid media reference")
+        return reference
+    if is_media_reference(value):
+        return value
+    data, content_type = decode_image_payload(value)
+    media_hash = await store_media(data, content_type)
+    schedule_image_variants(media_hash, None if read_back else data)
+    return f"{MEDIA_URL_PREFIX}{media_hash}"
+
+def sized_image_url(value: Optional[str], size: ImageSize) -> Optional[str]:
+    if not value or not value.startswith(MEDIA_URL_PREFIX):
+        return value
+    value = bare_media_url(value)
+    if size == ImageSize.ORIGINAL:
+        return value
+    return f"{value}?size={size.value}"
+
 # Legacy routes for backward compatibility
 @api_router.get("/")
 async def root():
@@ -303,8 +1608,8 @@ async def create_status_check(input: StatusCheckCreate):
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+    status_checks = await db.status_checks.find({}, model_projection(StatusCheck)).to_list(1000)
+    return json_response(read_documents(status_checks, StatusCheck))
 
 # Authentication endpoints
 @api_router.post("/auth/register", response_model=User)
@@ -319,25 +1624,31 @@ async def register(user_data: UserCreate, current_user: User = Depends(get_admin
         )
     
     # Hash password and create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     user_dict = user_data.dict()
     user_dict.pop("password")
-    user_dict["hashed_password"] = hashed_password
     
     user_obj = User(**user_dict)
-    await db.users.insert_one(user_obj.dict())
+    await db.users.insert_one({**user_obj.dict(), "hashed_password": hashed_password})
+    await bump_site_counters(total_users=1)
     return user_obj
 
 @api_router.post("/auth/login", response_model=Token)
 async def login(user_credentials: UserLogin):
     user = await db.users.find_one({"email": user_credentials.email})
-    if not user or not verify_password(user_credentials.password, user.get("hashed_password")):
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await verify_and_update_password(user_credentials.password, user.get("hashed_password"))
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if new_hash:
+        await db.users.update_one({"id": user["id"]}, {"$set": {"hashed_password": new_hash}})
+    
     if not user.get("is_active", True):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -355,27 +1666,25 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 # User management endpoints
 @api_router.get("/users", response_model=List[User])
 async def get_users(current_user: User = Depends(get_admin_user)):
-    users = await db.users.find().to_list(1000)
-    return [User(**user) for user in users]
+    users = await db.users.find({}, model_projection(User)).to_list(1000)
+    return json_response(read_documents(users, User))
 
 @api_router.put("/users/{user_id}", response_model=User)
 async def update_user(user_id: str, user_data: UserUpdate, current_user: User = Depends(get_admin_user)):
-    user = await db.users.find_one({"id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     update_data = user_data.dict(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
     
-    await db.users.update_one({"id": user_id}, {"$set": update_data})
-    updated_user = await db.users.find_one({"id": user_id})
+    updated_user = await update_by_id(db.users, user_id, update_data, "User not found")
+    user_cache.pop(updated_user["email"])
     return User(**updated_user)
 
 @api_router.delete("/users/{user_id}")
 async def delete_user(user_id: str, current_user: User = Depends(get_admin_user)):
-    result = await db.users.delete_one({"id": user_id})
-    if result.deleted_count == 0:
+    user = await db.users.find_one_and_delete({"id": user_id}, {"email": 1})
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    user_cache.pop(user["email"])
+    await bump_site_counters(total_users=-1)
     return {"message": "User deleted successfully"}
 
 # News management endpoints
@@ -383,53 +1692,91 @@ async def delete_user(user_id: str, current_user: User = Depends(get_admin_user)
 async def create_news(news_data: NewsCreate, current_user: User = Depends(get_current_user)):
     news_dict = news_data.dict()
     news_dict["author_id"] = current_user.id
+    news_dict["image"] = await externalize_image(news_dict.get("image"))
     
     if news_data.status == NewsStatus.PUBLISHED:
         news_dict["published_at"] = datetime.utcnow()
     
     news_obj = News(**news_dict)
     await db.news.insert_one(news_obj.dict())
+    await bump_site_counters(total_news=1)
+    await content_changed("news")
     return news_obj
 
-@api_router.get("/news", response_model=List[News])
+@api_router.get("/news", response_model=Union[List[News], List[NewsSummary]])
 async def get_news(
     status: Optional[NewsStatus] = None,
     limit: int = 50,
     skip: int = 0,
+    image_size: ImageSize = ImageSize.THUMB,
+    view: ListView = ListView.FULL,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     query = {}
     if status:
         query["status"] = status
     
-    news_list = await db.news.find(query).skip(skip).limit(limit).sort("created_at", -1).to_list(limit)
-    return [News(**news) for news in news_list]
+    projection = list_projection(News, NewsSummary, view, fields, "created_at")
+    news_list, next_cursor = await paginate(db.news, query, projection, "created_at", DESCENDING, limit, skip, cursor)
+    for news in news_list:
+        if "image" in news:
+            news["image"] = sized_image_url(news["image"], image_size)
+    if fields:
+        news_list = select_fields(news_list, fields, "created_at")
+    else:
+        news_list = read_documents(news_list, NewsSummary if view == ListView.SUMMARY else News)
+    return json_response(news_list, next_cursor_headers(next_cursor))
 
 @api_router.get("/news/{news_id}", response_model=News)
-async def get_news_by_id(news_id: str, current_user: User = Depends(get_current_user)):
-    news = await db.news.find_one({"id": news_id})
+async def get_news_by_id(news_id: str, request: Request, current_user: User = Depends(get_current_user)):
+    # Check validators against the timestamps alone before loading the full article
+    stamp = await db.news.find_one({"id": news_id}, {"_id": 0, "updated_at": 1, "created_at": 1})
+    if stamp is None:
+        raise HTTPException(status_code=404, detail="News not found")
+    modified = stamp.get("updated_at") or stamp.get("created_at")
+    news = None
+    if modified:
+        version = modified.isoformat()
+    else:
+        # Articles without timestamps are validated against their content
+        news = await db.news.find_one({"id": news_id}, model_projection(News))
+        version = hashlib.sha256(encode_json(news)).hexdigest() if news else ""
+    etag = '"{}"'.format(hashlib.sha256(f"{news_id}:{version}".encode()).hexdigest()[:32])
+    headers = validator_headers("news", etag, modified)
+    if not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+
+    if news is None:
+        news = await db.news.find_one({"id": news_id}, model_projection(News))
     if not news:
         raise HTTPException(status_code=404, detail="News not found")
-    return News(**news)
+    return json_response(read_documents([news], News)[0], headers)
 
 @api_router.put("/news/{news_id}", response_model=News)
 async def update_news(news_id: str, news_data: NewsUpdate, current_user: User = Depends(get_current_user)):
-    news = await db.news.find_one({"id": news_id})
-    if not news:
-        raise HTTPException(status_code=404, detail="News not found")
-    
-    # Check permissions
-    if current_user.role not in [UserRole.ADMIN, UserRole.MODERATOR] and news["author_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+    # Check permissions: editors may only update their own articles
+    scope = None
+    if current_user.role not in [UserRole.ADMIN, UserRole.MODERATOR]:
+        scope = {"author_id": current_user.id}
     
     update_data = news_data.dict(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
+    if "image" in update_data:
+        if not is_media_reference(update_data["image"]):
+            await check_update_target(db.news, news_id, "News not found", scope)
+        update_data["image"] = await externalize_image(update_data["image"])
     
-    if news_data.status == NewsStatus.PUBLISHED and news.get("status") != NewsStatus.PUBLISHED:
-        update_data["published_at"] = datetime.utcnow()
+    # Stamp published_at only on the transition to published
+    computed = None
+    if news_data.status == NewsStatus.PUBLISHED:
+        computed = {"published_at": {"$cond": [
+            {"$eq": ["$status", NewsStatus.PUBLISHED.value]}, "$published_at", datetime.utcnow()
+        ]}}
     
-    await db.news.update_one({"id": news_id}, {"$set": update_data})
-    updated_news = await db.news.find_one({"id": news_id})
+    updated_news = await update_by_id(db.news, news_id, update_data, "News not found", scope, computed)
+    await content_changed("news")
     return News(**updated_news)
 
 @api_router.delete("/news/{news_id}")
@@ -437,35 +1784,43 @@ async def delete_news(news_id: str, current_user: User = Depends(get_moderator_u
     result = await db.news.delete_one({"id": news_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="News not found")
+    await bump_site_counters(total_news=-1)
+    await content_changed("news")
     return {"message": "News deleted successfully"}
 
 # School info management endpoints
 @api_router.post("/school-info", response_model=SchoolInfo)
 async def create_school_info(info_data: SchoolInfoCreate, current_user: User = Depends(get_current_user)):
-    info_obj = SchoolInfo(**info_data.dict())
+    info_dict = info_data.dict()
+    info_dict["image"] = await externalize_image(info_dict.get("image"))
+    info_obj = SchoolInfo(**info_dict)
     await db.school_info.insert_one(info_obj.dict())
+    await content_changed("school_info")
     return info_obj
 
 @api_router.get("/school-info", response_model=List[SchoolInfo])
-async def get_school_info(section: Optional[str] = None):
-    query = {"is_active": True}
-    if section:
-        query["section"] = section
-    
-    info_list = await db.school_info.find(query).sort("order", 1).to_list(100)
-    return [SchoolInfo(**info) for info in info_list]
+async def get_school_info(request: Request, section: Optional[str] = None):
+    async def build():
+        query = {"is_active": True}
+        if section:
+            query["section"] = section
+        
+        info_list = await db.school_info.find(query, model_projection(SchoolInfo)).sort("order", 1).to_list(100)
+        return read_documents(info_list, SchoolInfo), {}
+
+    return await cached_json_response(request, "school_info", build)
 
 @api_router.put("/school-info/{info_id}", response_model=SchoolInfo)
 async def update_school_info(info_id: str, info_data: SchoolInfoUpdate, current_user: User = Depends(get_current_user)):
-    info = await db.school_info.find_one({"id": info_id})
-    if not info:
-        raise HTTPException(status_code=404, detail="School info not found")
-    
     update_data = info_data.dict(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
+    if "image" in update_data:
+        if not is_media_reference(update_data["image"]):
+            await check_update_target(db.school_info, info_id, "School info not found")
+        update_data["image"] = await externalize_image(update_data["image"])
     
-    await db.school_info.update_one({"id": info_id}, {"$set": update_data})
-    updated_info = await db.school_info.find_one({"id": info_id})
+    updated_info = await update_by_id(db.school_info, info_id, update_data, "School info not found")
+    await content_changed("school_info")
     return SchoolInfo(**updated_info)
 
 @api_router.delete("/school-info/{info_id}")
@@ -473,33 +1828,56 @@ async def delete_school_info(info_id: str, current_user: User = Depends(get_mode
     result = await db.school_info.delete_one({"id": info_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="School info not found")
+    await content_changed("school_info")
     return {"message": "School info deleted successfully"}
 
 # Gallery management endpoints
 @api_router.post("/gallery", response_model=Gallery)
 async def create_gallery_item(gallery_data: GalleryCreate, current_user: User = Depends(get_current_user)):
-    gallery_obj = Gallery(**gallery_data.dict())
+    gallery_dict = gallery_data.dict()
+    gallery_dict["image"] = await externalize_image(gallery_dict["image"])
+    gallery_obj = Gallery(**gallery_dict)
     await db.gallery.insert_one(gallery_obj.dict())
+    await content_changed("gallery")
     return gallery_obj
 
-@api_router.get("/gallery", response_model=List[Gallery])
-async def get_gallery(category: Optional[str] = None, limit: int = 50, skip: int = 0):
-    query = {"is_active": True}
-    if category:
-        query["category"] = category
-    
-    gallery_list = await db.gallery.find(query).skip(skip).limit(limit).sort("created_at", -1).to_list(limit)
-    return [Gallery(**item) for item in gallery_list]
+@api_router.get("/gallery", response_model=Union[List[Gallery], List[GallerySummary]])
+async def get_gallery(
+    request: Request,
+    category: Optional[str] = None,
+    limit: int = 50,
+    skip: int = 0,
+    image_size: ImageSize = ImageSize.THUMB,
+    view: ListView = ListView.FULL,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    async def build():
+        query = {"is_active": True}
+        if category:
+            query["category"] = category
+        
+        projection = list_projection(Gallery, GallerySummary, view, fields, "created_at")
+        gallery_list, next_cursor = await paginate(db.gallery, query, projection, "created_at", DESCENDING, limit, skip, cursor)
+        headers = next_cursor_headers(next_cursor)
+        for item in gallery_list:
+            if "image" in item:
+                item["image"] = sized_image_url(item["image"], image_size)
+        if fields:
+            return select_fields(gallery_list, fields, "created_at"), headers
+        return read_documents(gallery_list, GallerySummary if view == ListView.SUMMARY else Gallery), headers
+
+    return await cached_json_response(request, "gallery", build)
 
 @api_router.put("/gallery/{gallery_id}", response_model=Gallery)
 async def update_gallery_item(gallery_id: str, gallery_data: GalleryUpdate, current_user: User = Depends(get_current_user)):
-    gallery = await db.gallery.find_one({"id": gallery_id})
-    if not gallery:
-        raise HTTPException(status_code=404, detail="Gallery item not found")
-    
     update_data = gallery_data.dict(exclude_unset=True)
-    await db.gallery.update_one({"id": gallery_id}, {"$set": update_data})
-    updated_gallery = await db.gallery.find_one({"id": gallery_id})
+    if "image" in update_data:
+        if not is_media_reference(update_data["image"]):
+            await check_update_target(db.gallery, gallery_id, "Gallery item not found")
+        update_data["image"] = await externalize_image(update_data["image"])
+    updated_gallery = await update_by_id(db.gallery, gallery_id, update_data, "Gallery item not found")
+    await content_changed("gallery")
     return Gallery(**updated_gallery)
 
 @api_router.delete("/gallery/{gallery_id}")
@@ -507,6 +1885,7 @@ async def delete_gallery_item(gallery_id: str, current_user: User = Depends(get_
     result = await db.gallery.delete_one({"id": gallery_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Gallery item not found")
+    await content_changed("gallery")
     return {"message": "Gallery item deleted successfully"}
 
 # Contact management endpoints
@@ -514,24 +1893,24 @@ async def delete_gallery_item(gallery_id: str, current_user: User = Depends(get_
 async def create_contact(contact_data: ContactCreate, current_user: User = Depends(get_current_user)):
     contact_obj = Contact(**contact_data.dict())
     await db.contacts.insert_one(contact_obj.dict())
+    await content_changed("contacts")
     return contact_obj
 
 @api_router.get("/contacts", response_model=List[Contact])
-async def get_contacts():
-    contacts = await db.contacts.find({"is_active": True}).sort("order", 1).to_list(100)
-    return [Contact(**contact) for contact in contacts]
+async def get_contacts(request: Request):
+    async def build():
+        contacts = await db.contacts.find({"is_active": True}, model_projection(Contact)).sort("order", 1).to_list(100)
+        return read_documents(contacts, Contact), {}
+
+    return await cached_json_response(request, "contacts", build)
 
 @api_router.put("/contacts/{contact_id}", response_model=Contact)
 async def update_contact(contact_id: str, contact_data: ContactUpdate, current_user: User = Depends(get_current_user)):
-    contact = await db.contacts.find_one({"id": contact_id})
-    if not contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
-    
     update_data = contact_data.dict(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
     
-    await db.contacts.update_one({"id": contact_id}, {"$set": update_data})
-    updated_contact = await db.contacts.find_one({"id": contact_id})
+    updated_contact = await update_by_id(db.contacts, contact_id, update_data, "Contact not found")
+    await content_changed("contacts")
     return Contact(**updated_contact)
 
 @api_router.delete("/contacts/{contact_id}")
@@ -539,6 +1918,7 @@ async def delete_contact(contact_id: str, current_user: User = Depends(get_moder
     result = await db.contacts.delete_one({"id": contact_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Contact not found")
+    await content_changed("contacts")
     return {"message": "Contact deleted successfully"}
 
 # Schedule management endpoints
@@ -546,22 +1926,33 @@ async def delete_contact(contact_id: str, current_user: User = Depends(get_moder
 async def create_schedule(schedule_data: ScheduleCreate, current_user: User = Depends(get_current_user)):
     schedule_obj = Schedule(**schedule_data.dict())
     await db.schedule.insert_one(schedule_obj.dict())
+    await content_changed("schedule")
     return schedule_obj
 
-@api_router.get("/schedule", response_model=List[Schedule])
-async def get_schedule(limit: int = 50, skip: int = 0):
-    schedule_list = await db.schedule.find({"is_active": True}).skip(skip).limit(limit).sort("date", 1).to_list(limit)
-    return [Schedule(**item) for item in schedule_list]
+@api_router.get("/schedule", response_model=Union[List[Schedule], List[ScheduleSummary]])
+async def get_schedule(
+    request: Request,
+    limit: int = 50,
+    skip: int = 0,
+    view: ListView = ListView.FULL,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    async def build():
+        projection = list_projection(Schedule, ScheduleSummary, view, fields, "date")
+        schedule_list, next_cursor = await paginate(db.schedule, {"is_active": True}, projection, "date", ASCENDING, limit, skip, cursor)
+        headers = next_cursor_headers(next_cursor)
+        if fields:
+            return select_fields(schedule_list, fields, "date"), headers
+        return read_documents(schedule_list, ScheduleSummary if view == ListView.SUMMARY else Schedule), headers
+
+    return await cached_json_response(request, "schedule", build)
 
 @api_router.put("/schedule/{schedule_id}", response_model=Schedule)
 async def update_schedule(schedule_id: str, schedule_data: ScheduleUpdate, current_user: User = Depends(get_current_user)):
-    schedule = await db.schedule.find_one({"id": schedule_id})
-    if not schedule:
-        raise HTTPException(status_code=404, detail="Schedule item not found")
-    
     update_data = schedule_data.dict(exclude_unset=True)
-    await db.schedule.update_one({"id": schedule_id}, {"$set": update_data})
-    updated_schedule = await db.schedule.find_one({"id": schedule_id})
+    updated_schedule = await update_by_id(db.schedule, schedule_id, update_data, "Schedule item not found")
+    await content_changed("schedule")
     return Schedule(**updated_schedule)
 
 @api_router.delete("/schedule/{schedule_id}")
@@ -569,6 +1960,7 @@ async def delete_schedule(schedule_id: str, current_user: User = Depends(get_mod
     result = await db.schedule.delete_one({"id": schedule_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Schedule item not found")
+    await content_changed("schedule")
     return {"message": "Schedule item deleted successfully"}
 
 # Comment management endpoints
@@ -577,14 +1969,18 @@ async def create_comment(comment_data: CommentCreate):
     """Public endpoint for creating comments"""
     comment_obj = Comment(**comment_data.dict())
     await db.comments.insert_one(comment_obj.dict())
+    await bump_site_counters(total_comments=1, pending_comments=0 if comment_obj.is_approved else 1)
     return comment_obj
 
-@api_router.get("/comments", response_model=List[Comment])
+@api_router.get("/comments", response_model=Union[List[Comment], List[CommentSummary]])
 async def get_comments(
     news_id: Optional[str] = None,
     approved_only: bool = True,
     limit: int = 50,
     skip: int = 0,
+    view: ListView = ListView.FULL,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     query = {}
@@ -593,45 +1989,867 @@ async def get_comments(
     if approved_only and current_user.role not in [UserRole.ADMIN, UserRole.MODERATOR]:
         query["is_approved"] = True
     
-    comments = await db.comments.find(query).skip(skip).limit(limit).sort("created_at", -1).to_list(limit)
-    return [Comment(**comment) for comment in comments]
+    projection = list_projection(Comment, CommentSummary, view, fields, "created_at")
+    comments, next_cursor = await paginate(db.comments, query, projection, "created_at", DESCENDING, limit, skip, cursor)
+    if fields:
+        comments = select_fields(comments, fields, "created_at")
+    else:
+        comments = read_documents(comments, CommentSummary if view == ListView.SUMMARY else Comment)
+    return json_response(comments, next_cursor_headers(next_cursor))
 
 @api_router.put("/comments/{comment_id}", response_model=Comment)
 async def update_comment(comment_id: str, comment_data: CommentUpdate, current_user: User = Depends(get_moderator_user)):
-    comment = await db.comments.find_one({"id": comment_id})
-    if not comment:
-        raise HTTPException(status_code=404, detail="Comment not found")
-    
     update_data = comment_data.dict(exclude_unset=True)
-    await db.comments.update_one({"id": comment_id}, {"$set": update_data})
-    updated_comment = await db.comments.find_one({"id": comment_id})
+    # Fetch the previous state in the same round trip to keep pending_comments exact
+    previous = await update_by_id(
+        db.comments, comment_id, update_data, "Comment not found", return_document=ReturnDocument.BEFORE
+    )
+    updated_comment = {**previous, **update_data}
+    if previous.get("is_approved") != updated_comment.get("is_approved"):
+        await bump_site_counters(pending_comments=-1 if updated_comment["is_approved"] else 1)
     return Comment(**updated_comment)
 
+@api_router.post("/comments/moderate", response_model=ModerationResult)
+async def moderate_comments(moderation: CommentModeration, current_user: User = Depends(get_moderator_user)):
+    """Approve, reject or delete every comment matching an id list and/or filter"""
+    query = {}
+    if moderation.ids is not None:
+        query["id"] = {"$in": moderation.ids}
+    if moderation.news_id:
+        query["news_id"] = moderation.news_id
+    if moderation.author_email:
+        query["author_email"] = moderation.author_email
+    if moderation.created_from or moderation.created_to:
+        query["created_at"] = {}
+        if moderation.created_from:
+            query["created_at"]["$gte"] = moderation.created_from
+        if moderation.created_to:
+            query["created_at"]["$lt"] = moderation.created_to
+    if not query:
+        raise HTTPException(status_code=400, detail="Provide ids or at least one filter")
+
+    # Each write only touches comments whose state actually changes, so the
+    # returned counts are exactly the pending_comments delta.
+    if moderation.action == ModerationAction.APPROVE:
+        result = await db.comments.update_many({**query, "is_approved": False}, {"$set": {"is_approved": True}})
+        affected = result.modified_count
+        await bump_site_counters(pending_comments=-affected)
+    elif moderation.action == ModerationAction.REJECT:
+        result = await db.comments.update_many({**query, "is_approved": True}, {"$set": {"is_approved": False}})
+        affected = result.modified_count
+        await bump_site_counters(pending_comments=affected)
+    else:
+        # Both deletes are conditioned on state; an unconditioned second pass would also
+        # remove pending comments posted in between and count them as approved
+        pending = await db.comments.delete_many({**query, "is_approved": False})
+        approved = await db.comments.delete_many({**query, "is_approved": {"$ne": False}})
+        affected = pending.deleted_count + approved.deleted_count
+        await bump_site_counters(total_comments=-affected, pending_comments=-pending.deleted_count)
+
+    return ModerationResult(action=moderation.action, affected=affected)
+
 @api_router.delete("/comments/{comment_id}")
 async def delete_comment(comment_id: str, current_user: User = Depends(get_moderator_user)):
-    result = await db.comments.delete_one({"id": comment_id})
-    if result.deleted_count == 0:
+    comment = await db.comments.find_one_and_delete({"id": comment_id}, {"is_approved": 1})
+    if comment is None:
         raise HTTPException(status_code=404, detail="Comment not found")
+    await bump_site_counters(total_comments=-1, pending_comments=0 if comment.get("is_approved") else -1)
     return {"message": "Comment deleted successfully"}
 
+# Media endpoints
+@api_router.get("/media/{media_hash}")
+async def get_media(media_hash: str, size: ImageSize = ImageSize.ORIGINAL):
+    if not MEDIA_HASH_RE.match(media_hash):
+        raise HTTPException(status_code=404, detail="Media not found")
+    media = await db.media.find_one({"hash": media_hash})
+    if not media:
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    # Content-addressed blobs never change, so clients may cache them forever
+    cache_control = "public, max-age=31536000, immutable"
+    if size != ImageSize.ORIGINAL:
+        variant = media.get("variants", {}).get(size.value)
+        if variant:
+            media = variant
+        elif "variants" not in media:
+            # Variants are still rendering; don't pin the original under this URL
+            cache_control = "public, max-age=60"
+
+    headers = {"Cache-Control": cache_control, "ETag": f'"{media["hash"]}"', **MEDIA_SECURITY_HEADERS}
+    content_type = media["content_type"]
+    if content_type not in MEDIA_CONTENT_TYPES:
+        # Blobs stored before uploads were sniffed: never render them inline
+        content_type = "application/octet-stream"
+        headers["Content-Disposition"] = "attachment"
+    if media.get("backend", "disk") == "gridfs":
+        stream = await media_bucket.open_download_stream(media["hash"])
+
+        async def iter_chunks():
+            while chunk := await stream.readchunk():
+                yield chunk
+
+        headers["Content-Length"] = str(media["size"])
+        return StreamingResponse(iter_chunks(), media_type=content_type, headers=headers)
+
+    path = media_path(media["hash"])
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Media not found")
+    return FileResponse(path, media_type=content_type, headers=headers)
+
+# Diagnostics endpoints
+@api_router.get("/debug/caches")
+async def get_cache_stats(current_user: User = Depends(get_admin_user)):
+    return {name: cache.stats() for name, cache in caches.items()}
+
+@api_router.get("/debug/password-hashing")
+async def get_password_hashing_stats(current_user: User = Depends(get_admin_user)):
+    return {**password_stats, "workers": PASSWORD_WORKERS, "queue_limit": PASSWORD_QUEUE_LIMIT, "rounds": BCRYPT_ROUNDS}
+
+@api_router.get("/debug/slow-queries")
+async def get_slow_queries(
+    limit: int = 20,
+    sort_by: SlowQuerySort = SlowQuerySort.TOTAL,
+    current_user: User = Depends(get_admin_user)
+):
+    """Slowest query shapes since startup (or the last reset), with their winning plans"""
+    return {
+        "threshold_ms": SLOW_QUERY_MS,
+        "shapes": len(slow_query_log.entries),
+        "queries": slow_query_log.top(limit, sort_by.value),
+    }
+
+@api_router.delete("/debug/slow-queries")
+async def reset_slow_queries(current_user: User = Depends(get_admin_user)):
+    slow_query_log.clear()
+    return {"message": "Slow query log cleared"}
+
+class StackSampler:
+    """Statistical profiler: a helper thread records another thread's stack every interval"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.labels = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+
+    def frame_label(self, code) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            label = self.labels[code] = f"{Path(code.co_filename).stem}:{code.co_name}:{code.co_firstlineno}"
+        return label
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self.frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+profile_lock = asyncio.Lock()
+
+@api_router.post("/debug/profile")
+async def profile_event_loop(
+    seconds: float = 10,
+    format: ProfileFormat = ProfileFormat.COLLAPSED,
+    current_user: User = Depends(get_admin_user)
+):
+    """Sample the event-loop thread while it keeps serving requests; idle time shows up as select()"""
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {PROFILE_MAX_SECONDS:g}")
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with profile_lock:
+        sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            # Joining the sampler thread blocks, so keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, sampler.stop)
+
+    if format == ProfileFormat.JSON:
+        return {
+            "seconds": seconds,
+            "interval_ms": PROFILE_INTERVAL * 1000,
+            "samples": sampler.samples,
+            "stacks": [{"stack": stack.split(";"), "count": count} for stack, count in sampler.stacks.most_common()],
+        }
+    filename = f"profile-{datetime.utcnow():%Y%m%dT%H%M%S}.collapsed"
+    return Response(
+        content=sampler.collapsed(),
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+def coroutine_frames(coro) -> list:
+    """Frames of a suspended coroutine chain, outermost first, following each await down to the innermost"""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames
+
+def describe_task(task: asyncio.Task) -> dict:
+    """Name and the coroutine chain the task is suspended in, outermost first"""
+    return {
+        "name": task.get_name(),
+        "coroutine": getattr(task.get_coro(), "__qualname__", repr(task.get_coro())),
+        "stack": [f"{Path(frame.f_code.co_filename).stem}:{frame.f_code.co_name}:{frame.f_lineno}"
+                  for frame in coroutine_frames(task.get_coro())],
+    }
+
+@api_router.get("/debug/tasks")
+async def get_task_dump(current_user: User = Depends(get_admin_user)):
+    """Every pending asyncio task with the stack it is suspended at"""
+    current = asyncio.current_task()
+    tasks = [describe_task(task) for task in asyncio.all_tasks() if task is not current]
+    waiting_on = Counter(task["stack"][-1] if task["stack"] else task["coroutine"] for task in tasks)
+    return {"count": len(tasks), "waiting_on": dict(waiting_on.most_common()), "tasks": tasks}
+
+# Analytics endpoints
+@api_router.post("/track", status_code=status.HTTP_204_NO_CONTENT)
+async def track_visit(event: VisitEvent, request: Request):
+    """Public beacon; visits are buffered and written in batches"""
+    visitor_id = event.visitor_id
+    if not visitor_id:
+        # No client-side ID: fall back to a digest of address and user agent
+        client = request.client.host if request.client else ""
+        fingerprint = f"{client}|{request.headers.get('user-agent', '')}"
+        visitor_id = hashlib.sha256(fingerprint.encode()).hexdigest()
+    record_visit(event, visitor_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@api_router.get("/debug/visits")
+async def get_visit_stats(current_user: User = Depends(get_admin_user)):
+    return {**visit_stats, "buffered": len(visit_buffer), "buffer_size": VISIT_BUFFER_SIZE}
+
+# Homepage endpoint
+HOME_SOURCES = ["school_info", "news", "gallery", "contacts", "schedule"]
+
+@api_router.get("/home", response_model=HomePage)
+async def get_home(
+    request: Request,
+    news_limit: int = Query(5, ge=1, le=20),
+    gallery_limit: int = Query(12, ge=1, le=50),
+    schedule_limit: int = Query(10, ge=1, le=50),
+):
+    """Every public section of the homepage in one cached response"""
+    async def build():
+        school_info, news, gallery, contacts, schedule = await asyncio.gather(
+            db.school_info.find({"is_active": True}, model_projection(SchoolInfo)).sort("order", 1).to_list(100),
+            paginate(db.news, {"status": NewsStatus.PUBLISHED}, list_projection(News, NewsSummary, ListView.SUMMARY, None, "created_at"),
+                     "created_at", DESCENDING, news_limit, 0, None),
+            paginate(db.gallery, {"is_active": True}, list_projection(Gallery, GallerySummary, ListView.SUMMARY, None, "created_at"),
+                     "created_at", DESCENDING, gallery_limit, 0, None),
+            db.contacts.find({"is_active": True}, model_projection(Contact)).sort("order", 1).to_list(100),
+            paginate(db.schedule, {"is_active": True}, list_projection(Schedule, ScheduleSummary, ListView.SUMMARY, None, "date"),
+                     "date", ASCENDING, schedule_limit, 0, None),
+        )
+        news, gallery, schedule = news[0], gallery[0], schedule[0]
+        for info in school_info:
+            info["image"] = sized_image_url(info.get("image"), ImageSize.MEDIUM)
+        for item in news + gallery:
+            item["image"] = sized_image_url(item.get("image"), ImageSize.THUMB)
+        return {
+            "school_info": read_documents(school_info, SchoolInfo),
+            "news": read_documents(news, NewsSummary),
+            "gallery": read_documents(gallery, GallerySummary),
+            "contacts": read_documents(contacts, Contact),
+            "schedule": read_documents(schedule, ScheduleSummary),
+        }, {}
+
+    return await cached_json_response(request, "home", build, HOME_SOURCES)
+
+# Bulk endpoints
+BULK_TARGETS = {
+    BulkCollection.NEWS: {
+        "collection": "news", "label": "News", "model": News, "create": NewsCreate, "update": NewsUpdate,
+        "touch": True, "image": True, "cached": True,
+    },
+    BulkCollection.GALLERY: {
+        "collection": "gallery", "label": "Gallery item", "model": Gallery, "create": GalleryCreate,
+        "update": GalleryUpdate, "touch": False, "image": True, "cached": True,
+    },
+    BulkCollection.SCHEDULE: {
+        "collection": "schedule", "label": "Schedule item", "model": Schedule, "create": ScheduleCreate,
+        "update": ScheduleUpdate, "touch": False, "image": False, "cached": True,
+    },
+    BulkCollection.CONTACTS: {
+        "collection": "contacts", "label": "Contact", "model": Contact, "create": ContactCreate,
+        "update": ContactUpdate, "touch": True, "image": False, "cached": True,
+    },
+    BulkCollection.SCHOOL_INFO: {
+        "collection": "school_info", "label": "School info", "model": SchoolInfo, "create": SchoolInfoCreate,
+        "update": SchoolInfoUpdate, "touch": True, "image": True, "cached": True,
+    },
+    # Comments are created publicly; bulk covers moderation only
+    BulkCollection.COMMENTS: {
+        "collection": "comments", "label": "Comment", "model": Comment, "create": None,
+        "update": CommentUpdate, "touch": False, "image": False, "cached": False,
+    },
+}
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+
+def bulk_counter_effect(target: dict, operation: BulkOperation, current: dict):
+    """(state filter, per-document counter deltas) for an operation that moves site counters, else None.
+
+    The write is conditioned on the state the deltas were computed from, so a document
+    changed or deleted concurrently is simply not matched instead of being counted twice."""
+    if target["collection"] == "news":
+        return ({}, (("total_news", -1),)) if operation.op == BulkAction.DELETE else None
+    if target["collection"] != "comments":
+        return None
+    was_approved = bool(current.get("is_approved"))
+    state = {"is_approved": True if was_approved else {"$ne": True}}
+    if operation.op == BulkAction.DELETE:
+        return state, (("total_comments", -1), ("pending_comments", 0 if was_approved else -1))
+    is_approved = (operation.data or {}).get("is_approved")
+    if is_approved is not None and bool(is_approved) != was_approved:
+        return state, (("pending_comments", -1 if is_approved else 1),)
+    return None
+
+async def prepare_bulk_operation(target: dict, operation: BulkOperation, existing: dict, current_user: User, privileged: bool):
+    """Validate one bulk item and return (write request or None for a no-op, document id, counter effect)"""
+    data = operation.data or {}
+    if operation.op == BulkAction.CREATE:
+        if target["create"] is None:
+            raise HTTPException(status_code=405, detail=f"{target['label']} cannot be created in bulk")
+        try:
+            doc = target["create"](**data).dict()
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=validation_message(e))
+        if target["image"]:
+            doc["image"] = await externalize_image(doc.get("image"), read_back=True)
+        if target["collection"] == "news":
+            doc["author_id"] = current_user.id
+            if doc["status"] == NewsStatus.PUBLISHED:
+                doc["published_at"] = datetime.utcnow()
+        obj = target["model"](**doc)
+        return InsertOne(obj.dict()), obj.id, None
+
+    if not operation.id:
+        raise HTTPException(status_code=400, detail="id is required")
+    current = existing.get(operation.id)
+    if current is None:
+        raise HTTPException(status_code=404, detail=f"{target['label']} not found")
+
+    effect = bulk_counter_effect(target, operation, current)
+    match = {"id": operation.id, **(effect[0] if effect else {})}
+    if operation.op == BulkAction.DELETE:
+        if not privileged:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        return DeleteOne(match), operation.id, effect
+
+    if target["collection"] == "news" and not privileged and current.get("author_id") != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    try:
+        update_data = target["update"](**data).dict(exclude_unset=True)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=validation_message(e))
+    if not update_data:
+        return None, operation.id, None
+    if target["touch"]:
+        update_data["updated_at"] = datetime.utcnow()
+    if target["image"] and "image" in update_data:
+        update_data["image"] = await externalize_image(update_data["image"], read_back=True)
+    if (target["collection"] == "news" and update_data.get("status") == NewsStatus.PUBLISHED
+            and current.get("status") != NewsStatus.PUBLISHED):
+        update_data["published_at"] = datetime.utcnow()
+    return UpdateOne(match, build_update(update_data)), operation.id, effect
+
+async def run_bulk_batch(collection, batch: List[tuple], results: List[BulkItemResult]) -> int:
+    """bulk_write one batch of (result index, request) pairs and return how many documents it matched or removed"""
+    try:
+        outcome = (await collection.bulk_write([request for _, request in batch], ordered=False)).bulk_api_result
+    except BulkWriteError as e:
+        outcome = e.details
+        for error in outcome.get("writeErrors", []):
+            result = results[batch[error["index"]][0]]
+            result.status = 409 if error.get("code") == 11000 else 400
+            result.error = error.get("errmsg")
+    return outcome.get("nRemoved", 0) + outcome.get("nMatched", 0)
+
+async def delete_each(collection, effect: tuple, batch: List[tuple], results: List[BulkItemResult]) -> int:
+    """Delete a batch document by document and return how many this request removed.
+
+    A shared delete count can't tell which documents another request removed first,
+    so counter-moving deletes go one per document and each result reflects its own outcome.
+    """
+    state, _ = effect
+    removed = await asyncio.gather(*(
+        collection.find_one_and_delete({"id": results[index].id, **state}, {"_id": 1}) for index, _ in batch
+    ))
+    missed = {results[index].id: index for (index, _), doc in zip(batch, removed) if doc is None}
+    if missed:
+        # Still there: its state changed in between; gone: another request deleted it first
+        remaining = {doc["id"] async for doc in collection.find({"id": {"$in": list(missed)}}, {"_id": 0, "id": 1})}
+        for doc_id, index in missed.items():
+            result = results[index]
+            if doc_id in remaining:
+                result.status, result.error = 409, "Changed concurrently, nothing was written"
+            else:
+                result.status, result.error = 404, "Already deleted"
+    return len(batch) - len(missed)
+
+async def settle_counter_batch(collection, effect: tuple, batch: List[tuple], results: List[BulkItemResult]):
+    """Mark the approval flips of a conditioned batch that did not take effect as conflicts"""
+    state, _ = effect
+    pending = {results[index].id: index for index, _ in batch if results[index].status < 300}
+    # A flip that took effect moved its document out of the state it was conditioned on
+    flipped = {doc["id"] async for doc in collection.find(
+        {"id": {"$in": list(pending)}, "$nor": [state]}, {"_id": 0, "id": 1}
+    )}
+    for doc_id in set(pending) - flipped:
+        result = results[pending[doc_id]]
+        result.status, result.error = 409, "Changed concurrently, nothing was written"
+
+@api_router.post("/{collection}/bulk", response_model=BulkResult)
+async def bulk_write_collection(
+    collection: BulkCollection,
+    operations: List[BulkOperation],
+    current_user: User = Depends(get_current_user)
+):
+    """Apply many create/update/delete operations with one validation pass and a few unordered bulk_writes.
+
+    News and comment deletes, which move site counters, are issued one per document instead.
+    """
+    target = BULK_TARGETS[collection]
+    privileged = current_user.role in [UserRole.ADMIN, UserRole.MODERATOR]
+    if collection == BulkCollection.COMMENTS and not privileged:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if len(operations) > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_OPERATIONS} operations per request")
+
+    # One read tells us which ids exist, and the state permission and counter checks need
+    ids = list({operation.id for operation in operations if operation.op != BulkAction.CREATE and operation.id})
+    existing = {}
+    if ids:
+        cursor = db[target["collection"]].find(
+            {"id": {"$in": ids}}, {"_id": 0, "id": 1, "author_id": 1, "status": 1, "is_approved": 1}
+        )
+        existing = {doc["id"]: doc async for doc in cursor}
+
+    # Counter-moving operations are written in batches keyed by their effect, so each
+    # batch's matched/removed count says exactly how far to move the counters
+    results = []
+    batches, batch_effects = {None: []}, {}
+    seen = set()
+    for index, operation in enumerate(operations):
+        if operation.op != BulkAction.CREATE and operation.id and operation.id in seen:
+            results.append(BulkItemResult(
+                index=index, op=operation.op, id=operation.id, status=409, error="Duplicate id in this request"
+            ))
+            continue
+        if operation.op != BulkAction.CREATE:
+            seen.add(operation.id)
+        try:
+            request, doc_id, effect = await prepare_bulk_operation(target, operation, existing, current_user, privileged)
+        except HTTPException as e:
+            results.append(BulkItemResult(index=index, op=operation.op, id=operation.id, status=e.status_code, error=e.detail))
+            continue
+        results.append(BulkItemResult(
+            index=index, op=operation.op, id=doc_id, status=201 if operation.op == BulkAction.CREATE else 200
+        ))
+        if request is not None:
+            key = (type(request).__name__, effect[1]) if effect else None
+            batches.setdefault(key, []).append((index, request))
+            if effect:
+                batch_effects[key] = effect
+
+    coll = db[target["collection"]]
+    deltas = {}
+    for key, batch in batches.items():
+        if not batch:
+            continue
+        if key is None:
+            await run_bulk_batch(coll, batch, results)
+            continue
+        effect = batch_effects[key]
+        if isinstance(batch[0][1], DeleteOne):
+            applied = await delete_each(coll, effect, batch, results)
+        else:
+            applied = await run_bulk_batch(coll, batch, results)
+            if applied < sum(1 for index, _ in batch if results[index].status < 300):
+                await settle_counter_batch(coll, effect, batch, results)
+        for counter, delta in effect[1]:
+            deltas[counter] = deltas.get(counter, 0) + delta * applied
+
+    if target["collection"] == "news":
+        created = sum(1 for result in results if result.op == BulkAction.CREATE and result.status < 300)
+        deltas["total_news"] = deltas.get("total_news", 0) + created
+    if any(deltas.values()):
+        await bump_site_counters(**{counter: delta for counter, delta in deltas.items() if delta})
+    if target["cached"] and any(result.status < 300 for result in results):
+        await content_changed(target["collection"])
+    succeeded = sum(1 for result in results if result.status < 300)
+    return BulkResult(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+# Import endpoints
+async def iter_lines(chunks):
+    """Split an async stream of byte chunks into decoded lines"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+async def parse_ndjson(lines):
+    """Yield (row number, document or None, error or None) per non-blank line"""
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, row, None
+
+async def parse_csv(lines):
+    """Like parse_ndjson for CSV with a header row; empty cells are left unset"""
+    header = None
+    number = 0
+    record = ""
+    async for line in lines:
+        record = f"{record}\n{line}" if record else line
+        # Quotes are escaped by doubling, so an odd count means a quoted field continues
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if not any(values):
+            continue
+        if len(values) != len(header):
+            yield number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield number, {name: value for name, value in zip(header, values) if value != ""}, None
+    if record:
+        yield number + 1, None, "Unterminated quoted field"
+
+async def prepare_import_row(target: dict, row: dict, author_id: str):
+    """Validate one imported row into an upsert by id; fields the row omits are only set on insert"""
+    defaults = {"author_id": author_id} if target["collection"] == "news" else {}
+    try:
+        target["create"](**row)
+        doc = target["model"](**{**defaults, **row}).dict()
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=validation_message(e))
+
+    provided = (set(row) & set(doc)) | {"id"}
+    if target["touch"] and "updated_at" not in row:
+        provided.add("updated_at")
+    if target["collection"] == "news" and doc["status"] == NewsStatus.PUBLISHED and not doc["published_at"]:
+        doc["published_at"] = datetime.utcnow()
+    if target["image"] and "image" in provided:
+        doc["image"] = await externalize_image(doc["image"], read_back=True)
+
+    update = {"$set": {field: doc[field] for field in provided}}
+    on_insert = {field: value for field, value in doc.items() if field not in provided}
+    if on_insert:
+        update["$setOnInsert"] = on_insert
+    return UpdateOne({"id": doc["id"]}, update, upsert=True), doc["id"]
+
+async def import_rows(target: dict, rows, author_id: str, batch_size: int = IMPORT_BATCH_SIZE) -> ImportResult:
+    """Upsert parsed rows in unordered bulk_write batches.
+
+    Only one batch is written while the next is parsed, so a fast producer waits on
+    the database instead of buffering: memory stays around two batches.
+    """
+    result = ImportResult()
+    collection = db[target["collection"]]
+    started = time.perf_counter()
+
+    def fail(number: int, doc_id: Optional[str], error: str):
+        result.failed += 1
+        if len(result.errors) < IMPORT_MAX_ERRORS:
+            result.errors.append(ImportRowError(row=number, id=doc_id, error=error))
+
+    async def write(batch):
+        try:
+            details = (await collection.bulk_write([request for _, _, request in batch], ordered=False)).bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get("writeErrors", []):
+                number, doc_id, _ = batch[error["index"]]
+                fail(number, doc_id, error.get("errmsg"))
+        result.inserted += details.get("nUpserted", 0)
+        result.updated += details.get("nMatched", 0)
+
+    batch = []
+    writing = None
+    try:
+        async for number, row, error in rows:
+            result.rows += 1
+            if error:
+                fail(number, None, error)
+                continue
+            try:
+                request, doc_id = await prepare_import_row(target, row, author_id)
+            except HTTPException as e:
+                fail(number, row.get("id") if isinstance(row.get("id"), str) else None, e.detail)
+                continue
+            batch.append((number, doc_id, request))
+            if len(batch) >= batch_size:
+                if writing:
+                    await writing
+                writing = asyncio.create_task(write(batch))
+                batch = []
+        if batch:
+            if writing:
+                await writing
+            writing = asyncio.create_task(write(batch))
+    finally:
+        if writing:
+            await writing
+
+    if target["collection"] == "news" and result.inserted:
+        await bump_site_counters(total_news=result.inserted)
+    if target["cached"] and result.inserted + result.updated:
+        await content_changed(target["collection"])
+    result.seconds = round(time.perf_counter() - started, 3)
+    result.rows_per_second = round(result.rows / result.seconds, 1) if result.seconds else 0.0
+    return result
+
+@api_router.post("/import/{collection}", response_model=ImportResult)
+async def import_collection(
+    collection: BulkCollection,
+    request: Request,
+    format: ImportFormat = ImportFormat.NDJSON,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    current_user: User = Depends(get_admin_user)
+):
+    """Upsert documents by id from an NDJSON or CSV request body, parsed as it arrives"""
+    target = BULK_TARGETS[collection]
+    if target["create"] is None:
+        raise HTTPException(status_code=405, detail=f"{target['label']} cannot be imported")
+    if batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be positive")
+    lines = iter_lines(request.stream())
+    rows = parse_csv(lines) if format == ImportFormat.CSV else parse_ndjson(lines)
+    return await import_rows(target, rows, current_user.id, batch_size)
+
+# Search endpoints
+def search_snippet(field: str):
+    """Trim a text field server-side so results never carry full bodies"""
+    return {"$substrCP": [{"$ifNull": [f"${field}", ""]}, 0, SEARCH_SNIPPET_LENGTH]}
+
+SEARCH_SOURCES = {
+    "news": {
+        "collection": "news",
+        "filter": {},
+        "fields": {
+            "title": "$title",
+            "snippet": {"$ifNull": ["$excerpt", search_snippet("content")]},
+            "status": "$status",
+            "date": "$published_at",
+        },
+    },
+    "schedule": {
+        "collection": "schedule",
+        "filter": {"is_active": True},
+        "fields": {"title": "$title", "snippet": search_snippet("description"), "date": "$date"},
+    },
+    "school_info": {
+        "collection": "school_info",
+        "filter": {"is_active": True},
+        "fields": {"title": "$title", "snippet": search_snippet("content"), "section": "$section"},
+    },
+}
+
+def encode_search_cursor(result: SearchResult) -> str:
+    payload = json.dumps([result.score, result.type, result.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, kind, last_id = json.loads(payload)
+        return float(score), str(kind), str(last_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def search_after(kind: str, cursor: Optional[str]) -> Optional[dict]:
+    """Keyset condition on (score desc, type, id) for one source"""
+    if not cursor:
+        return None
+    score, last_kind, last_id = decode_search_cursor(cursor)
+    if kind < last_kind:
+        return {"score": {"$lt": score}}
+    if kind > last_kind:
+        return {"score": {"$lte": score}}
+    return {"$or": [{"score": {"$lt": score}}, {"score": score, "id": {"$gt": last_id}}]}
+
+async def search_source(kind: str, q: str, status_filter: Optional[dict], limit: int, cursor: Optional[str]):
+    source = SEARCH_SOURCES[kind]
+    match = {"$text": {"$search": q}, **source["filter"]}
+    if kind == "news" and status_filter:
+        match.update(status_filter)
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    after = search_after(kind, cursor)
+    if after:
+        pipeline.append({"$match": after})
+    pipeline += [
+        {"$sort": {"score": -1, "id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "id": 1, "score": 1, **source["fields"]}},
+    ]
+    docs = await db[source["collection"]].aggregate(pipeline).to_list(limit)
+    return [SearchResult(type=kind, **doc) for doc in docs]
+
+@api_router.get("/search", response_model=List[SearchResult])
+async def search(
+    response: Response,
+    q: str,
+    types: Optional[str] = None,
+    status: Optional[NewsStatus] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """Ranked full-text search over news, schedule and school info"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    kinds = sorted(SEARCH_SOURCES)
+    if types:
+        kinds = sorted({kind.strip() for kind in types.split(",") if kind.strip()})
+        unknown = set(kinds) - set(SEARCH_SOURCES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+    limit = max(1, min(limit, 100))
+
+    # Anonymous visitors only ever see published news
+    if current_user is None:
+        status_filter = {"status": NewsStatus.PUBLISHED.value}
+    else:
+        status_filter = {"status": status.value} if status else None
+
+    per_source = await asyncio.gather(*(search_source(kind, q, status_filter, limit, cursor) for kind in kinds))
+    results = sorted(
+        (result for results in per_source for result in results),
+        key=lambda result: (-result.score, result.type, result.id),
+    )[:limit]
+    if len(results) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_search_cursor(results[-1])
+    return results
+
+# Export endpoints
+# Collection, read model and the timestamp ?since= filters on. Gallery, schedule and
+# comments don't record edits, so their incremental exports only pick up new documents.
+EXPORT_TARGETS = {
+    ExportCollection.USERS: ("users", User, "updated_at"),
+    ExportCollection.NEWS: ("news", News, "updated_at"),
+    ExportCollection.SCHOOL_INFO: ("school_info", SchoolInfo, "updated_at"),
+    ExportCollection.GALLERY: ("gallery", Gallery, "created_at"),
+    ExportCollection.CONTACTS: ("contacts", Contact, "updated_at"),
+    ExportCollection.SCHEDULE: ("schedule", Schedule, "created_at"),
+    ExportCollection.COMMENTS: ("comments", Comment, "created_at"),
+}
+
+@api_router.get("/export/{collection}")
+async def export_collection(
+    collection: ExportCollection,
+    since: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    gzip: bool = False,
+    current_user: User = Depends(get_admin_user)
+):
+    """Stream a collection as NDJSON, one cursor batch in memory at a time"""
+    name, model, changed_field = EXPORT_TARGETS[collection]
+    if batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be positive")
+    if since and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    query = {changed_field: {"$gte": since}} if since else {}
+    cursor = db[name].find(query, model_projection(model)).batch_size(batch_size)
+
+    async def chunks():
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if gzip else None
+        batch = []
+        try:
+            async for doc in cursor:
+                batch.append(encode_json(doc))
+                if len(batch) < batch_size:
+                    continue
+                chunk = b"\n".join(batch) + b"\n"
+                batch.clear()
+                yield compressor.compress(chunk) if compressor else chunk
+            chunk = b"\n".join(batch) + b"\n" if batch else b""
+            yield compressor.compress(chunk) + compressor.flush() if compressor else chunk
+        finally:
+            await cursor.close()
+
+    filename = f"{name}-{datetime.utcnow():%Y%m%dT%H%M%S}.ndjson" + (".gz" if gzip else "")
+    return StreamingResponse(
+        chunks(),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 # Statistics endpoints
 @api_router.get("/stats", response_model=SiteStats)
 async def get_stats(current_user: User = Depends(get_current_user)):
-    # Get counts from different collections
-    total_users = await db.users.count_documents({})
-    total_news = await db.news.count_documents({})
-    total_comments = await db.comments.count_documents({})
-    pending_comments = await db.comments.count_documents({"is_approved": False})
+    # Totals are maintained by the write handlers; count only if they were never built
+    today = datetime.strptime(visit_day(datetime.utcnow()), "%Y-%m-%d")
+    counters, today_rollup, unique_visitors = await asyncio.gather(
+        db.site_counters.find_one({"_id": SITE_COUNTERS_ID}),
+        db.visit_rollups.find_one({"_id": visit_day(today)}, {"total": 1}),
+        cached_unique_visitor_estimates(today),
+    )
+    if counters is None:
+        counters = await reconcile_site_counters()
+    daily_visits = (today_rollup or {}).get("total", 0)
     
-    # For now, we'll use placeholder values for visits
-    # In a real application, you would implement proper analytics
     stats = SiteStats(
-        total_visits=0,
-        daily_visits=0,
-        total_users=total_users,
-        total_news=total_news,
-        total_comments=total_comments,
-        pending_comments=pending_comments
+        total_visits=counters.get("total_visits", 0),
+        daily_visits=daily_visits,
+        unique_visitors_daily=unique_visitors["daily"],
+        unique_visitors_weekly=unique_visitors["weekly"],
+        unique_visitors_monthly=unique_visitors["monthly"],
+        unique_visitors_error=HyperLogLog().standard_error,
+        total_users=counters.get("total_users", 0),
+        total_news=counters.get("total_news", 0),
+        total_comments=counters.get("total_comments", 0),
+        pending_comments=counters.get("pending_comments", 0)
     )
     
     return stats
@@ -654,31 +2872,215 @@ async def init_admin():
     
     # Prepare data for database insertion
     admin_data = admin_user.dict()
-    admin_data["hashed_password"] = get_password_hash("admin123")
+    admin_data["hashed_password"] = await hash_password("admin123")
     
     # Insert into database with hashed_password
     await db.users.insert_one(admin_data)
+    await bump_site_counters(total_users=1)
     
     return {"message": "Admin user created successfully", "email": "admin@school.com", "password": "admin123"}
 
 # Include the router in the main app (after all endpoints are defined)
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    if METRICS_TOKEN:
+        if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    elif not METRICS_PUBLIC:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Set METRICS_TOKEN (or METRICS_PUBLIC=true) to enable metrics")
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and body size per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        response = {"status": 500, "size": 0}
+
+        async def send_and_measure(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            http_in_flight.dec()
+            # The router stores the matched route on the scope; label by its template, not the raw path
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            http_requests.inc(*labels, str(response["status"]))
+            http_request_seconds.observe(time.perf_counter() - started, *labels)
+            http_response_bytes.observe(response["size"], *labels)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
-logger = logging.getLogger(__name__)
+
+# Index registry: every index the queries above rely on, reconciled at startup.
+# List indexes follow (filter fields..., sort key, id) to back keyset pagination.
+def unique_id_index():
+    return IndexModel([("id", ASCENDING)], unique=True)
+
+INDEXES = {
+    "users": [
+        unique_id_index(),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "news": [
+        unique_id_index(),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel(
+            [("title", TEXT), ("excerpt", TEXT), ("content", TEXT)],
+            weights={"title": 10, "excerpt": 5, "content": 1},
+            default_language=SEARCH_LANGUAGE,
+        ),
+    ],
+    "school_info": [
+        unique_id_index(),
+        IndexModel([("is_active", ASCENDING), ("order", ASCENDING)]),
+        IndexModel([("is_active", ASCENDING), ("section", ASCENDING), ("order", ASCENDING)]),
+        IndexModel(
+            [("title", TEXT), ("content", TEXT)],
+            weights={"title": 10, "content": 1},
+            default_language=SEARCH_LANGUAGE,
+        ),
+    ],
+    "gallery": [
+        unique_id_index(),
+        IndexModel([("is_active", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("is_active", ASCENDING), ("category", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "contacts": [
+        unique_id_index(),
+        IndexModel([("is_active", ASCENDING), ("order", ASCENDING)]),
+    ],
+    "schedule": [
+        unique_id_index(),
+        IndexModel([("is_active", ASCENDING), ("date", ASCENDING), ("id", ASCENDING)]),
+        IndexModel(
+            [("title", TEXT), ("description", TEXT), ("location", TEXT)],
+            weights={"title": 10, "description": 2, "location": 2},
+            default_language=SEARCH_LANGUAGE,
+        ),
+    ],
+    "comments": [
+        unique_id_index(),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("is_approved", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("news_id", ASCENDING), ("is_approved", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("author_email", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "media": [
+        IndexModel([("hash", ASCENDING)], unique=True),
+    ],
+}
+
+def index_signature(keys, unique=False, weights=None, default_language=None):
+    keys = [(field, direction if isinstance(direction, str) else int(direction)) for field, direction in keys]
+    # Mongo reports text indexes as _fts/_ftsx keys plus weights; compare by their text fields
+    # and stemming language (so changing SEARCH_LANGUAGE rebuilds them)
+    text_fields = sorted(weights) if weights else sorted(field for field, direction in keys if direction == TEXT)
+    language = None
+    if text_fields:
+        keys = [(field, direction) for field, direction in keys if direction != TEXT and field not in ("_fts", "_ftsx")]
+        keys += [(field, TEXT) for field in text_fields]
+        language = default_language or "english"
+    return tuple(keys), bool(unique), language
+
+async def index_plan():
+    """Compare INDEXES with the database; returns {collection: {"missing": [...], "extra": [...]}}"""
+    plan = {}
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        existing_signatures = {
+            index_signature(info["key"], info.get("unique"), info.get("weights"), info.get("default_language")): name
+            for name, info in existing.items()
+        }
+        declared = {
+            index_signature(
+                index.document["key"].items(), index.document.get("unique"), None, index.document.get("default_language")
+            ): index
+            for index in indexes
+        }
+        plan[collection] = {
+            "missing": [index for signature, index in declared.items() if signature not in existing_signatures],
+            "extra": [
+                name for signature, name in existing_signatures.items()
+                if signature not in declared and name != "_id_"
+            ],
+            # A collection can only have one text index, so a changed one must be dropped first
+            "replaced_text": [
+                name for signature, name in existing_signatures.items()
+                if signature not in declared and signature[2] is not None
+            ],
+        }
+    return plan
+
+async def ensure_indexes():
+    plan = await index_plan()
+    for collection, diff in plan.items():
+        if diff["replaced_text"] and any(TEXT in index.document["key"].values() for index in diff["missing"]):
+            for name in diff["replaced_text"]:
+                await db[collection].drop_index(name)
+                logger.info("Dropped outdated text index %s on %s", name, collection)
+                diff["extra"].remove(name)
+        for index in diff["missing"]:
+            try:
+                await db[collection].create_indexes([index])
+                logger.info("Created index %s on %s", index.document["name"], collection)
+            except OperationFailure as e:
+                # e.g. duplicate emails in legacy data; keep serving and report it
+                logger.error("Could not create index %s on %s: %s", index.document["name"], collection, e)
+        if diff["extra"]:
+            logger.warning("Undeclared indexes on %s: %s", collection, ", ".join(diff["extra"]))
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes()
+
+@app.on_event("startup")
+async def start_background_jobs():
+    slow_query_log.loop = asyncio.get_running_loop()
+    for job in (reconcile_site_counters_periodically(), flush_visits_periodically()):
+        task = asyncio.create_task(job)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    try:
+        await flush_visits()
+    except Exception:
+        logger.exception("Flushing visits on shutdown failed")
+    if image_tasks:
+        await asyncio.wait(image_tasks, timeout=10)
+    image_pool.shutdown(wait=False)
+    password_pool.shutdown(wait=False)
     client.close()
@@ -0,0 +1,348 @@
+"""Load test and benchmark harness for the School Admin Panel API.
+
+Seeds a throwaway database, drives concurrent workloads per endpoint class and
+prints latency percentiles and throughput as JSON, e.g.
+
+    python backend_bench.py --mongo memory --news 1000 --comments 5000
+    python backend_bench.py --mongo mongodb://localhost:27017 --workers 4 -o bench.json
+
+With --mongo memory the app runs in-process against mongomock through an ASGI
+transport (no sockets, single process), which is only useful to compare code paths.
+With a MongoDB URL the app is started with uvicorn in a subprocess against a fresh
+database that is dropped afterwards unless --keep-db is given.
+
+Install backend/requirements-dev.txt first (httpx, mongomock-motor).
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
+ADMIN_EMAIL = "admin@school.com"
+ADMIN_PASSWORD = "admin123"
+USER_PASSWORD = "bench-password"
+WORDS = (
+    "школа урок класс учитель ученик экзамен праздник концерт олимпиада спорт "
+    "school lesson class teacher student exam holiday concert olympiad sport library"
+).split()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo", default=os.environ.get("BENCH_MONGO_URL", "memory"),
+                        help="MongoDB URL, or 'memory' for the in-process mongomock stand-in")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (MongoDB mode only)")
+    parser.add_argument("--keep-db", action="store_true", help="Don't drop the benchmark database")
+    parser.add_argument("--news", type=int, default=10000)
+    parser.add_argument("--comments", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--gallery", type=int, default=40, help="Gallery items uploaded as base64 images")
+    parser.add_argument("--image-kb", type=int, default=512, help="Approximate size of each uploaded image")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per workload")
+    parser.add_argument("--workloads", default="public_reads,authenticated_reads,writes,login_storm")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for generated data and request mix")
+    parser.add_argument("-o", "--output", help="Write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+def words(n):
+    return " ".join(random.choice(WORDS) for _ in range(n))
+
+def image_base64(size_kb):
+    """A random-noise JPEG of roughly size_kb as a data URL (noise defeats compression)"""
+    side = max(16, int(math.sqrt(size_kb * 1024 / 1.5)))
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+# Setup
+def import_server(mongo_url, db_name, media_root):
+    os.environ["MONGO_URL"] = mongo_url
+    os.environ["DB_NAME"] = db_name
+    os.environ["MEDIA_ROOT"] = media_root
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+async def seed(server, db, args):
+    """Insert users, news and comments directly; images go through the API later"""
+    password_hash = server.get_password_hash(USER_PASSWORD)
+    now = datetime.utcnow()
+    users = [{**server.User(
+        email=ADMIN_EMAIL, full_name="Bench Admin", role=server.UserRole.ADMIN,
+    ).dict(), "hashed_password": server.get_password_hash(ADMIN_PASSWORD)}]
+    users += [{**server.User(
+        email=f"user{i}@bench.example.com", full_name=f"Bench User {i}", role=server.UserRole.EDITOR,
+    ).dict(), "hashed_password": password_hash} for i in range(args.users)]
+    await db.users.insert_many(users)
+
+    news_ids = []
+    for start in range(0, args.news, 1000):
+        batch = []
+        for i in range(start, min(start + 1000, args.news)):
+            created = now - timedelta(minutes=args.news - i)
+            published = random.random() < 0.8
+            news = server.News(
+                title=words(6), content=words(300), excerpt=words(25), author_id=users[0]["id"],
+                status=server.NewsStatus.PUBLISHED if published else server.NewsStatus.DRAFT,
+                created_at=created, updated_at=created, published_at=created if published else None,
+            )
+            batch.append(news.dict())
+            news_ids.append(news.id)
+        await db.news.insert_many(batch)
+
+    for start in range(0, args.comments, 1000):
+        batch = [server.Comment(
+            content=words(30), author_name=f"Reader {i}", author_email=f"reader{i}@bench.example.com",
+            news_id=random.choice(news_ids), is_approved=random.random() < 0.9,
+        ).dict() for i in range(start, min(start + 1000, args.comments))] if news_ids else []
+        if batch:
+            await db.comments.insert_many(batch)
+
+    await db.school_info.insert_many([server.SchoolInfo(
+        section=section, title=words(3), content=words(400), order=order,
+    ).dict() for order, section in enumerate(["about", "history", "mission", "admission"])])
+    await db.contacts.insert_many([server.Contact(
+        type=kind, label=words(2), value=value, order=order,
+    ).dict() for order, (kind, value) in enumerate([("phone", "+7 000 000-00-00"), ("email", "office@bench.example.com"), ("address", words(5))])])
+    await db.schedule.insert_many([server.Schedule(
+        title=words(4), description=words(20), date=now + timedelta(days=i), time="10:00", location=words(2),
+    ).dict() for i in range(200)])
+    await server.reconcile_site_counters()
+    return {"news_ids": news_ids, "user_emails": [user["email"] for user in users[1:]]}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def start_uvicorn(args, env):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(300):
+            try:
+                if (await client.get("/api/")).status_code == 200:
+                    return process, base_url
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            await asyncio.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 30 seconds")
+
+# Workloads: each returns a coroutine factory taking (client, context) and issuing one request
+async def login(client, email, password):
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def public_reads(client, ctx):
+    return random.choice([
+        ("GET /api/home", lambda: client.get("/api/home")),
+        ("GET /api/gallery", lambda: client.get("/api/gallery", params={"view": "summary", "limit": 24})),
+        ("GET /api/schedule", lambda: client.get("/api/schedule", params={"limit": 20})),
+        ("GET /api/school-info", lambda: client.get("/api/school-info")),
+        ("GET /api/contacts", lambda: client.get("/api/contacts")),
+        ("POST /api/track", lambda: client.post("/api/track", json={"path": "/", "visitor_id": str(random.getrandbits(64))})),
+    ])
+
+def authenticated_reads(client, ctx):
+    headers = random.choice(ctx["tokens"])
+    news_id = random.choice(ctx["news_ids"]) if ctx["news_ids"] else "missing"
+    return random.choice([
+        ("GET /api/news", lambda: client.get("/api/news", params={"view": "summary", "limit": 20}, headers=headers)),
+        ("GET /api/news/{id}", lambda: client.get(f"/api/news/{news_id}", headers=headers)),
+        ("GET /api/comments", lambda: client.get("/api/comments", params={"news_id": news_id, "limit": 20}, headers=headers)),
+        ("GET /api/auth/me", lambda: client.get("/api/auth/me", headers=headers)),
+        ("GET /api/stats", lambda: client.get("/api/stats", headers=ctx["admin"])),
+    ])
+
+def writes(client, ctx):
+    headers = random.choice(ctx["tokens"])
+    news_id = random.choice(ctx["news_ids"]) if ctx["news_ids"] else "missing"
+
+    async def create_news():
+        response = await client.post("/api/news", json={"title": words(6), "content": words(200)}, headers=headers)
+        if response.status_code == 200:
+            ctx["created_news"].append((headers, response.json()["id"]))
+        return response
+
+    async def update_news():
+        if not ctx["created_news"]:
+            return await create_news()
+        owner, own_id = random.choice(ctx["created_news"])
+        return await client.put(f"/api/news/{own_id}", json={"title": words(6)}, headers=owner)
+
+    return random.choice([
+        ("POST /api/news", create_news),
+        ("PUT /api/news/{id}", update_news),
+        ("POST /api/comments", lambda: client.post("/api/comments", json={
+            "content": words(20), "author_name": "Bench", "news_id": news_id,
+        })),
+    ])
+
+def login_storm(client, ctx):
+    email = random.choice(ctx["user_emails"])
+    return ("POST /api/auth/login", lambda: client.post("/api/auth/login", json={"email": email, "password": USER_PASSWORD}))
+
+WORKLOADS = {
+    "public_reads": public_reads,
+    "authenticated_reads": authenticated_reads,
+    "writes": writes,
+    "login_storm": login_storm,
+}
+
+# Measurement
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[rank] * 1000, 2)
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+    }
+
+async def run_workload(client, name, ctx, args):
+    pick = WORKLOADS[name]
+    samples = {}
+    deadline = time.perf_counter() + args.duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            endpoint, send = pick(client, ctx)
+            started = time.perf_counter()
+            try:
+                ok = (await send()).status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            samples.setdefault(endpoint, []).append((time.perf_counter() - started, ok))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    report = summarize([sample for endpoint in samples.values() for sample in endpoint], elapsed)
+    report["endpoints"] = {endpoint: summarize(values, elapsed) for endpoint, values in sorted(samples.items())}
+    return report
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=BACKEND_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+async def main(args):
+    random.seed(args.seed)
+    workloads = [name.strip() for name in args.workloads.split(",") if name.strip()]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        raise SystemExit(f"Unknown workloads: {', '.join(sorted(unknown))}")
+
+    started_at = datetime.utcnow()
+    memory = args.mongo == "memory"
+    db_name = f"bench_{started_at:%Y%m%d%H%M%S}_{os.getpid()}"
+    media_root = tempfile.mkdtemp(prefix="bench-media-")
+    server = import_server("mongodb://localhost:27017" if memory else args.mongo, db_name, media_root)
+    if memory:
+        from mongomock_motor import AsyncMongoMockClient
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[db_name]
+
+    process = None
+    seed_started = time.perf_counter()
+    ctx = await seed(server, server.db, args)
+    seed_seconds = time.perf_counter() - seed_started
+    try:
+        if memory:
+            await server.app.router.startup()
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench", timeout=60)
+        else:
+            process, base_url = await start_uvicorn(args, os.environ.copy())
+            client = httpx.AsyncClient(
+                base_url=base_url, timeout=60,
+                limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+            )
+        async with client:
+            ctx["admin"] = await login(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+            ctx["tokens"] = [await login(client, email, USER_PASSWORD) for email in ctx["user_emails"][:8]] or [ctx["admin"]]
+            ctx["created_news"] = []
+            image = image_base64(args.image_kb)
+            upload_started = time.perf_counter()
+            for i in range(args.gallery):
+                response = await client.post("/api/gallery", json={"title": words(3), "image": image}, headers=ctx["admin"])
+                response.raise_for_status()
+            upload_seconds = time.perf_counter() - upload_started
+
+            results = {}
+            for name in workloads:
+                results[name] = await run_workload(client, name, ctx, args)
+                print(f"{name}: {results[name]['rps']} req/s, p95 {results[name]['p95_ms']} ms", file=sys.stderr)
+    finally:
+        if memory:
+            await server.app.router.shutdown()
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        if not memory and not args.keep_db:
+            await server.client.drop_database(db_name)
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "mongo": "memory" if memory else "mongod",
+        "workers": 1 if memory else args.workers,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "dataset": {
+            "news": args.news, "comments": args.comments, "users": args.users,
+            "gallery": args.gallery, "image_kb": args.image_kb, "seed": args.seed,
+        },
+        "setup": {
+            "seed_s": round(seed_seconds, 2),
+            "gallery_upload_s": round(upload_seconds, 2),
+        },
+        "workloads": results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,2 @@
+# backend_test.py and backend_bench.py are standalone scripts with their own runners
+collect_ignore = ["backend_test.py", "backend_bench.py"]
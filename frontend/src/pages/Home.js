@@ -14,8 +14,17 @@ const Home = () => {
     }
   };
 
+  const trackVisit = () => {
+    const payload = JSON.stringify({ path: window.location.pathname });
+    const blob = new Blob([payload], { type: 'application/json' });
+    if (!(navigator.sendBeacon && navigator.sendBeacon(`${API}/track`, blob))) {
+      axios.post(`${API}/track`, JSON.parse(payload)).catch(() => {});
+    }
+  };
+
   useEffect(() => {
     helloWorldApi();
+    trackVisit();
   }, []);
 
   return (
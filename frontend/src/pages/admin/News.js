@@ -22,7 +22,7 @@ const News = () => {
 
   const fetchNews = async () => {
     try {
-      const response = await newsAPI.getAll();
+      const response = await newsAPI.getAll({ view: 'summary' });
       setNews(response.data);
     } catch (error) {
       console.error('Failed to fetch news:', error);
@@ -55,16 +55,23 @@ const News = () => {
     }
   };
 
-  const handleEdit = (newsItem) => {
-    setEditingNews(newsItem);
-    setFormData({
-      title: newsItem.title,
-      content: newsItem.content,
-      excerpt: newsItem.excerpt || '',
-      image: newsItem.image || '',
-      status: newsItem.status
-    });
-    setShowForm(true);
+  const handleEdit = async (newsItem) => {
+    try {
+      // The list only holds summaries; load the full article for editing
+      const response = await newsAPI.getById(newsItem.id);
+      const fullNews = response.data;
+      setEditingNews(fullNews);
+      setFormData({
+        title: fullNews.title,
+        content: fullNews.content,
+        excerpt: fullNews.excerpt || '',
+        image: fullNews.image || '',
+        status: fullNews.status
+      });
+      setShowForm(true);
+    } catch (error) {
+      console.error('Failed to load news:', error);
+    }
   };
 
   const handleDelete = async (id) => {
@@ -106,4 +106,9 @@ export const statsAPI = {
   get: () => api.get('/stats'),
 };
 
+// Homepage API: every public section in one request
+export const homeAPI = {
+  get: (params = {}) => api.get('/home', { params }),
+};
+
 export default api;
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""Shared fixtures: the backend app in-process against a fresh mongomock database per test."""
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("MEDIA_ROOT", tempfile.mkdtemp(prefix="tests-media-"))
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+import server  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    client = AsyncMongoMockClient()
+    database = client[f"tests_{uuid.uuid4().hex[:12]}"]
+    monkeypatch.setattr(server, "client", client)
+    monkeypatch.setattr(server, "db", database)
+    # Process-local caches would otherwise leak state between tests
+    for cache in (server.user_cache, server.token_cache, server.version_cache, server.response_cache.local):
+        cache.clear()
+    server.unique_visitor_cache.clear()
+    server.visit_buffer.clear()
+    return database
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def admin(client):
+    """Authorization headers for the default admin account"""
+    client.post("/api/init-admin")
+    response = client.post("/api/auth/login", json={"email": "admin@school.com", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion, e.g. to seed or inspect the database directly"""
+    return asyncio.run
+
+
+@pytest.fixture
+def counters(client, admin):
+    """Current materialized site counters as served by /api/stats"""
+    def read():
+        return client.get("/api/stats", headers=admin).json()
+    return read
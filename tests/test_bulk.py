@@ -0,0 +1,119 @@
+"""Bulk writes keep site counters in step with what was actually written."""
+import server
+
+
+def create_news(client, admin, title="Title"):
+    response = client.post(
+        "/api/news", json={"title": title, "content": "Body", "excerpt": "Excerpt", "status": "published"}, headers=admin
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def create_comment(client, news_id):
+    response = client.post("/api/comments", json={"content": "Hi", "author_name": "Reader", "news_id": news_id})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def statuses(response):
+    return [(item["status"], item.get("error")) for item in response.json()["results"]]
+
+
+def test_bulk_create_update_delete(client, admin, counters):
+    kept, deleted = create_news(client, admin, "Kept"), create_news(client, admin, "Deleted")
+    response = client.post("/api/news/bulk", json=[
+        {"op": "create", "data": {"title": "New", "content": "Body", "status": "draft"}},
+        {"op": "update", "id": kept, "data": {"title": "Renamed"}},
+        {"op": "delete", "id": deleted},
+        {"op": "update", "id": "missing", "data": {"title": "Nope"}},
+    ], headers=admin)
+
+    assert response.status_code == 200
+    assert [status for status, _ in statuses(response)] == [201, 200, 200, 404]
+    assert response.json()["succeeded"] == 3
+    assert client.get(f"/api/news/{kept}", headers=admin).json()["title"] == "Renamed"
+    assert client.get(f"/api/news/{deleted}", headers=admin).status_code == 404
+    assert counters()["total_news"] == 2
+
+
+def test_duplicate_delete_counts_once(client, admin, counters):
+    news_id = create_news(client, admin)
+    assert counters()["total_news"] == 1
+
+    response = client.post(
+        "/api/news/bulk", json=[{"op": "delete", "id": news_id}, {"op": "delete", "id": news_id}], headers=admin
+    )
+
+    assert statuses(response) == [(200, None), (409, "Duplicate id in this request")]
+    assert counters()["total_news"] == 0
+
+
+def test_comment_moderation_counters(client, admin, counters):
+    news_id = create_news(client, admin)
+    first, second, third = (create_comment(client, news_id) for _ in range(3))
+    assert (counters()["total_comments"], counters()["pending_comments"]) == (3, 3)
+
+    response = client.post("/api/comments/bulk", json=[
+        {"op": "update", "id": first, "data": {"is_approved": True}},
+        {"op": "delete", "id": second},
+        {"op": "delete", "id": first},
+        {"op": "update", "id": third, "data": {"is_approved": True}},
+    ], headers=admin)
+
+    assert [status for status, _ in statuses(response)] == [200, 200, 409, 200]
+    assert (counters()["total_comments"], counters()["pending_comments"]) == (2, 0)
+
+
+def test_concurrently_deleted_comment_is_not_counted_twice(client, admin, counters, monkeypatch):
+    news_id = create_news(client, admin)
+    comment_id = create_comment(client, news_id)
+    prepare = server.prepare_bulk_operation
+
+    async def deleted_meanwhile(target, operation, *args):
+        prepared = await prepare(target, operation, *args)
+        # Another moderator deletes the comment (moving the counters) before the bulk write
+        await server.db.comments.delete_one({"id": operation.id})
+        await server.bump_site_counters(total_comments=-1, pending_comments=-1)
+        return prepared
+
+    monkeypatch.setattr(server, "prepare_bulk_operation", deleted_meanwhile)
+    response = client.post("/api/comments/bulk", json=[{"op": "delete", "id": comment_id}], headers=admin)
+
+    assert statuses(response) == [(404, "Already deleted")]
+    assert response.json()["succeeded"] == 0
+    assert (counters()["total_comments"], counters()["pending_comments"]) == (0, 0)
+
+
+def test_delete_after_concurrent_approval_conflicts(client, admin, counters, monkeypatch):
+    news_id = create_news(client, admin)
+    approved_meanwhile, deleted = create_comment(client, news_id), create_comment(client, news_id)
+    prepare = server.prepare_bulk_operation
+
+    async def approved_in_between(target, operation, *args):
+        prepared = await prepare(target, operation, *args)
+        if operation.id == approved_meanwhile:
+            await server.db.comments.update_one({"id": operation.id}, {"$set": {"is_approved": True}})
+            await server.bump_site_counters(pending_comments=-1)
+        return prepared
+
+    monkeypatch.setattr(server, "prepare_bulk_operation", approved_in_between)
+    response = client.post("/api/comments/bulk", json=[
+        {"op": "delete", "id": approved_meanwhile}, {"op": "delete", "id": deleted},
+    ], headers=admin)
+
+    assert statuses(response) == [(409, "Changed concurrently, nothing was written"), (200, None)]
+    assert (counters()["total_comments"], counters()["pending_comments"]) == (1, 0)
+
+
+def test_non_privileged_users_cannot_moderate_in_bulk(client, admin):
+    registered = client.post("/api/auth/register", json={
+        "email": "editor@example.com", "password": "secret123", "full_name": "Editor", "role": "editor"
+    }, headers=admin)
+    assert registered.status_code == 200
+    login = client.post("/api/auth/login", json={"email": "editor@example.com", "password": "secret123"})
+    editor = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    response = client.post("/api/comments/bulk", json=[{"op": "delete", "id": "x"}], headers=editor)
+    assert response.status_code == 403
+
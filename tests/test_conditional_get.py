@@ -0,0 +1,71 @@
+"""ETag/Last-Modified validators and invalidation of the public response cache."""
+import server
+
+
+def test_unchanged_list_is_not_modified(client):
+    first = client.get("/api/gallery")
+    etag = first.headers["ETag"]
+
+    assert client.get("/api/gallery", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/gallery", headers={"If-None-Match": '"gallery-other"'}).status_code == 200
+    assert client.get("/api/gallery", headers={"If-None-Match": f'W/{etag}, "x"'}).status_code == 304
+
+
+def test_write_invalidates_cached_list(client, admin):
+    before = client.get("/api/contacts")
+    assert before.json() == []
+
+    client.post("/api/contacts", json={"type": "phone", "label": "Office", "value": "555"}, headers=admin)
+
+    after = client.get("/api/contacts")
+    assert [contact["label"] for contact in after.json()] == ["Office"]
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert client.get("/api/contacts", headers={"If-None-Match": before.headers["ETag"]}).status_code == 200
+    assert client.get("/api/contacts", headers={"If-Modified-Since": after.headers["Last-Modified"]}).status_code == 304
+
+
+def test_home_changes_with_any_source(client, admin):
+    etag = client.get("/api/home").headers["ETag"]
+    client.post("/api/schedule", json={"title": "Exam", "date": "2030-05-01T09:00:00", "time": "09:00"}, headers=admin)
+
+    response = client.get("/api/home", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()["schedule"]] == ["Exam"]
+
+
+def test_cache_hits_do_not_read_content_versions(client, monkeypatch):
+    client.get("/api/gallery")
+    reads = []
+    collection_class = type(server.db.content_versions)
+    find = collection_class.find
+
+    def counting_find(self, *args, **kwargs):
+        if self.name == "content_versions":
+            reads.append(args)
+        return find(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_class, "find", counting_find)
+    for _ in range(3):
+        assert client.get("/api/gallery").status_code == 200
+    assert reads == []
+
+
+def test_article_validators(client, admin, db, run):
+    news_id = client.post("/api/news", json={"title": "T", "content": "Body"}, headers=admin).json()["id"]
+    first = client.get(f"/api/news/{news_id}", headers=admin)
+    etag = first.headers["ETag"]
+    assert client.get(f"/api/news/{news_id}", headers={**admin, "If-None-Match": etag}).status_code == 304
+
+    client.put(f"/api/news/{news_id}", json={"title": "Changed"}, headers=admin)
+    changed = client.get(f"/api/news/{news_id}", headers={**admin, "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["title"] == "Changed"
+
+
+def test_article_without_timestamps(client, admin, db, run):
+    news_id = client.post("/api/news", json={"title": "T", "content": "Body"}, headers=admin).json()["id"]
+    run(db.news.update_one({"id": news_id}, {"$unset": {"updated_at": 1, "created_at": 1}}))
+
+    response = client.get(f"/api/news/{news_id}", headers=admin)
+    assert response.status_code == 200
+    revalidated = client.get(f"/api/news/{news_id}", headers={**admin, "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
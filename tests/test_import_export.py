@@ -0,0 +1,149 @@
+"""NDJSON/CSV import by id and streamed NDJSON export."""
+import asyncio
+import base64
+import gzip
+import io
+import json
+import time
+from datetime import datetime
+
+from PIL import Image
+
+import server
+
+
+def png_bytes(seed: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), (seed, 0, 0)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def png_data_url(seed: int) -> str:
+    return "data:image/png;base64," + base64.b64encode(png_bytes(seed)).decode()
+
+
+def post_import(client, admin, collection, body, **params):
+    response = client.post(f"/api/import/{collection}", content=body, params=params, headers=admin)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_ndjson_import_reports_bad_rows(client, admin, counters):
+    body = "\n".join([
+        json.dumps({"id": "n1", "title": "First", "content": "Body", "status": "published"}),
+        "{not json",
+        json.dumps({"id": "n2", "title": "Second", "content": "Body"}),
+        json.dumps({"id": "n3", "content": "No title"}),
+        "",
+    ])
+
+    result = post_import(client, admin, "news", body, batch_size=2)
+
+    assert (result["rows"], result["inserted"], result["updated"], result["failed"]) == (4, 2, 0, 2)
+    assert [error["row"] for error in result["errors"]] == [2, 4]
+    assert counters()["total_news"] == 2
+    first = client.get("/api/news/n1", headers=admin).json()
+    assert first["status"] == "published" and first["published_at"]
+
+
+def test_reimport_updates_only_provided_fields(client, admin, counters):
+    post_import(client, admin, "news", json.dumps({"id": "n1", "title": "Old", "content": "Body", "excerpt": "Kept"}))
+
+    result = post_import(client, admin, "news", json.dumps({"id": "n1", "title": "New", "content": "Body"}))
+
+    assert (result["inserted"], result["updated"]) == (0, 1)
+    news = client.get("/api/news/n1", headers=admin).json()
+    assert (news["title"], news["excerpt"]) == ("New", "Kept")
+    assert counters()["total_news"] == 1
+
+
+def test_csv_import_with_quoted_newlines(client, admin):
+    body = 'id,type,label,value,order\r\nc1,phone,Office,"+1 555\r\n0100",2\r\nc2,email,Mail,info@example.com,\r\nc3,email\r\n'
+
+    result = post_import(client, admin, "contacts", body, format="csv")
+
+    assert (result["inserted"], result["failed"]) == (2, 1)
+    assert result["errors"][0]["error"] == "Expected 5 columns, got 2"
+    contacts = {contact["id"]: contact for contact in client.get("/api/contacts").json()}
+    assert contacts["c1"]["value"] == "+1 555\n0100"
+    assert contacts["c1"]["order"] == 2 and contacts["c2"]["order"] == 0
+
+
+def test_comments_cannot_be_imported(client, admin):
+    response = client.post("/api/import/comments", content="{}", headers=admin)
+    assert response.status_code == 405
+
+
+def test_export_round_trips(client, admin):
+    rows = [json.dumps({"id": f"n{i}", "title": f"Title {i}", "content": "Body"}) for i in range(5)]
+    post_import(client, admin, "news", "\n".join(rows))
+
+    response = client.get("/api/export/news", params={"batch_size": 2}, headers=admin)
+    assert response.status_code == 200
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(doc["id"] for doc in exported) == [f"n{i}" for i in range(5)]
+
+    compressed = client.get("/api/export/news", params={"gzip": True}, headers=admin)
+    assert sorted(gzip.decompress(compressed.content).splitlines()) == sorted(response.content.splitlines())
+
+    # An export can be imported again unchanged
+    result = post_import(client, admin, "news", response.content)
+    assert (result["inserted"], result["updated"], result["failed"]) == (0, 5, 0)
+
+
+def test_user_export_omits_password_hashes(client, admin):
+    response = client.get("/api/export/users", headers=admin)
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert [user["email"] for user in users] == ["admin@school.com"]
+    assert "hashed_password" not in users[0]
+
+
+def test_export_since(client, admin, db, run):
+    post_import(client, admin, "news", json.dumps({"id": "old", "title": "Old", "content": "Body"}))
+    run(db.news.update_one({"id": "old"}, {"$set": {"updated_at": datetime(2020, 1, 1)}}))
+    post_import(client, admin, "news", json.dumps({"id": "new", "title": "New", "content": "Body"}))
+
+    response = client.get("/api/export/news", params={"since": "2021-01-01T00:00:00Z"}, headers=admin)
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["new"]
+
+
+def test_export_requires_admin(client):
+    assert client.get("/api/export/news").status_code in (401, 403)
+
+
+def test_imported_images_are_not_held_by_variant_jobs(client, admin, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(server, "schedule_image_variants", lambda media_hash, data=None: scheduled.append(data))
+    rows = [json.dumps({"id": f"g{i}", "title": f"Photo {i}", "image": png_data_url(i)}) for i in range(5)]
+
+    result = post_import(client, admin, "gallery", "\n".join(rows))
+
+    assert (result["inserted"], result["failed"]) == (5, 0)
+    assert scheduled == [None] * 5
+
+
+def test_variant_jobs_hold_a_bounded_number_of_images(db, run, monkeypatch):
+    holding, peak = 0, 0
+
+    async def read_media(media):
+        nonlocal holding, peak
+        holding += 1
+        peak = max(peak, holding)
+        await asyncio.sleep(0.01)
+        return b"image bytes"
+
+    def render(data):
+        nonlocal holding
+        time.sleep(0.01)
+        holding -= 1
+        return {}
+
+    async def build_all():
+        hashes = [await server.store_media(png_bytes(i), "image/png") for i in range(12)]
+        await asyncio.gather(*(server.build_image_variants(media_hash) for media_hash in hashes))
+
+    monkeypatch.setattr(server, "image_slots", asyncio.Semaphore(2))
+    monkeypatch.setattr(server, "read_media", read_media)
+    monkeypatch.setattr(server, "render_image_variants", render)
+    run(build_all())
+    assert peak == 2
@@ -0,0 +1,89 @@
+"""Uploaded images are typed by their bytes and served so browsers never execute them."""
+import base64
+import io
+
+from PIL import Image
+
+import server
+
+
+def data_url(payload: bytes, declared: str = "image/png") -> str:
+    return f"data:{declared};base64,{base64.b64encode(payload).decode()}"
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), (200, 20, 20)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def create_gallery_item(client, admin, image):
+    return client.post("/api/gallery", json={"title": "Photo", "image": image}, headers=admin)
+
+
+def test_html_declared_as_png_is_rejected(client, admin):
+    response = create_gallery_item(client, admin, data_url(b"<html><script>alert(1)</script></html>"))
+    assert response.status_code == 400
+
+
+def test_svg_is_rejected(client, admin):
+    svg = b'<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg" onload="alert(1)"/>'
+    assert create_gallery_item(client, admin, data_url(svg, "image/svg+xml")).status_code == 400
+
+
+def test_declared_type_is_ignored(client, admin):
+    response = create_gallery_item(client, admin, data_url(png_bytes(), "text/html"))
+    assert response.status_code == 200
+
+    media = client.get(response.json()["image"])
+    assert media.status_code == 200
+    assert media.headers["content-type"] == "image/png"
+    assert media.headers["x-content-type-options"] == "nosniff"
+    assert "sandbox" in media.headers["content-security-policy"]
+
+
+def test_legacy_active_content_is_served_as_attachment(client, db, run):
+    media_hash = run(server.store_media(b"<svg onload='alert(1)'/>", "image/svg+xml"))
+
+    response = client.get(f"/api/media/{media_hash}")
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["content-disposition"].startswith("attachment")
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_listed_image_url_round_trips(client, admin):
+    item_id = create_gallery_item(client, admin, data_url(png_bytes())).json()["id"]
+    listed = client.get("/api/gallery").json()[0]["image"]
+    assert listed.endswith("?size=thumb")
+
+    # Saving the item back with the URL it was listed with keeps the same reference
+    updated = client.put(f"/api/gallery/{item_id}", json={"image": listed}, headers=admin)
+    assert updated.status_code == 200
+    assert "?" not in updated.json()["image"]
+
+    relisted = client.get("/api/gallery").json()[0]["image"]
+    assert relisted == listed
+    assert client.get(relisted).status_code == 200
+
+
+def test_bulk_and_import_store_bare_references(client, admin):
+    media_hash = "a" * 64
+    client.post("/api/gallery/bulk", json=[
+        {"op": "create", "data": {"id": "g1", "title": "Bulk", "image": f"/api/media/{media_hash}?size=medium"}},
+    ], headers=admin)
+    client.post("/api/import/gallery", content=f'{{"id": "g2", "title": "Imported", "image": "/api/media/{media_hash}?size=thumb#x"}}', headers=admin)
+
+    images = {item["title"]: item["image"] for item in client.get("/api/gallery", params={"image_size": "original"}).json()}
+    assert images == {"Bulk": f"/api/media/{media_hash}", "Imported": f"/api/media/{media_hash}"}
+
+
+def test_malformed_media_reference_is_rejected(client, admin):
+    for reference in ("/api/media/not-a-hash", "/api/media/../../etc/passwd", f"/api/media/{'a' * 63}?size=thumb"):
+        assert create_gallery_item(client, admin, reference).status_code == 400
+
+
+def test_sized_urls_replace_an_existing_query():
+    reference = f"/api/media/{'b' * 64}"
+    assert server.sized_image_url(f"{reference}?size=thumb?size=thumb", server.ImageSize.MEDIUM) == f"{reference}?size=medium"
+    assert server.sized_image_url(f"{reference}?size=thumb", server.ImageSize.ORIGINAL) == reference
+    assert server.sized_image_url("https://cdn.example.com/a.png?w=1", server.ImageSize.THUMB) == "https://cdn.example.com/a.png?w=1"
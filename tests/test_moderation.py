@@ -0,0 +1,108 @@
+"""Moderating many comments at once by ids and/or filters."""
+from datetime import datetime
+
+import server
+
+
+def create_comment(client, news_id, email="reader@example.com"):
+    response = client.post(
+        "/api/comments", json={"content": "Hi", "author_name": "Reader", "author_email": email, "news_id": news_id}
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def moderate(client, admin, **body):
+    response = client.post("/api/comments/moderate", json=body, headers=admin)
+    assert response.status_code == 200
+    return response.json()["affected"]
+
+
+def comment_counts(counters):
+    stats = counters()
+    return stats["total_comments"], stats["pending_comments"]
+
+
+def test_approve_and_reject_by_ids(client, admin, counters):
+    ids = [create_comment(client, "n1") for _ in range(3)]
+
+    assert moderate(client, admin, action="approve", ids=ids[:2]) == 2
+    assert comment_counts(counters) == (3, 1)
+    # Already approved comments are not counted again
+    assert moderate(client, admin, action="approve", ids=ids) == 1
+    assert comment_counts(counters) == (3, 0)
+
+    assert moderate(client, admin, action="reject", ids=ids[:1]) == 1
+    assert comment_counts(counters) == (3, 1)
+    visible = client.get("/api/comments", params={"news_id": "n1"}, headers=admin).json()
+    assert {comment["id"]: comment["is_approved"] for comment in visible} == {ids[0]: False, ids[1]: True, ids[2]: True}
+
+
+def test_filters_combine(client, admin, counters):
+    spam = [create_comment(client, "n1", "spam@example.com") for _ in range(2)]
+    create_comment(client, "n1")
+    create_comment(client, "n2", "spam@example.com")
+
+    assert moderate(client, admin, action="approve", news_id="n1", author_email="spam@example.com") == 2
+    approved = {comment["id"] for comment in client.get("/api/comments", params={"news_id": "n1"}, headers=admin).json()
+                if comment["is_approved"]}
+    assert approved == set(spam)
+    assert comment_counts(counters) == (4, 2)
+
+
+def test_delete_by_filter_counts_both_states(client, admin, counters):
+    ids = [create_comment(client, "n1") for _ in range(4)]
+    create_comment(client, "n2")
+    moderate(client, admin, action="approve", ids=ids[:1])
+    assert comment_counts(counters) == (5, 4)
+
+    assert moderate(client, admin, action="delete", news_id="n1") == 4
+    assert comment_counts(counters) == (1, 1)
+
+
+def test_delete_by_ids_and_date_window(client, admin, counters, db, run):
+    old, recent = create_comment(client, "n1"), create_comment(client, "n1")
+    run(db.comments.update_one({"id": old}, {"$set": {"created_at": datetime(2020, 1, 1)}}))
+
+    assert moderate(client, admin, action="delete", ids=[old, recent], created_to="2021-01-01T00:00:00") == 1
+    remaining = [comment["id"] for comment in client.get("/api/comments", params={"news_id": "n1"}, headers=admin).json()]
+    assert remaining == [recent]
+    assert comment_counts(counters) == (1, 1)
+
+
+def test_pending_comment_posted_during_delete_survives(client, admin, counters, monkeypatch):
+    approved = create_comment(client, "n1")
+    create_comment(client, "n1")
+    moderate(client, admin, action="approve", ids=[approved])
+    collection_class = type(server.db.comments)
+    delete_many = collection_class.delete_many
+    posted = []
+
+    async def comment_posted_in_between(self, query, *args, **kwargs):
+        result = await delete_many(self, query, *args, **kwargs)
+        if query.get("is_approved") is False and not posted:
+            posted.append(True)
+            await server.create_comment(server.CommentCreate(content="Late", author_name="Reader", news_id="n1"))
+        return result
+
+    monkeypatch.setattr(collection_class, "delete_many", comment_posted_in_between)
+    assert moderate(client, admin, action="delete", news_id="n1") == 2
+
+    assert comment_counts(counters) == (1, 1)
+    assert len(client.get("/api/comments", params={"news_id": "n1"}, headers=admin).json()) == 1
+
+
+def test_selection_is_required(client, admin):
+    response = client.post("/api/comments/moderate", json={"action": "delete"}, headers=admin)
+    assert response.status_code == 400
+
+
+def test_editors_cannot_moderate(client, admin):
+    client.post("/api/auth/register", json={
+        "email": "editor@example.com", "password": "secret123", "full_name": "Editor", "role": "editor"
+    }, headers=admin)
+    login = client.post("/api/auth/login", json={"email": "editor@example.com", "password": "secret123"})
+    editor = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    response = client.post("/api/comments/moderate", json={"action": "approve", "ids": ["x"]}, headers=editor)
+    assert response.status_code == 403
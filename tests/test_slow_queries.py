@@ -0,0 +1,87 @@
+"""The slow-query listener, driven with the driver's own command events."""
+from datetime import timedelta
+
+from pymongo import monitoring
+
+import server
+
+CONNECTION = ("localhost", 27017)
+
+
+def send(listener, command, duration_ms, request_id=1, database="school", failed=False):
+    command_name = next(iter(command))
+    listener.started(monitoring.CommandStartedEvent(command, database, request_id, CONNECTION, request_id))
+    duration = timedelta(milliseconds=duration_ms)
+    if failed:
+        listener.failed(monitoring.CommandFailedEvent(duration, {"ok": 0}, command_name, request_id, CONNECTION, request_id))
+    else:
+        listener.succeeded(monitoring.CommandSucceededEvent(duration, {"ok": 1}, command_name, request_id, CONNECTION, request_id))
+
+
+def find(status, skip=0):
+    return {"find": "news", "filter": {"status": status}, "sort": {"created_at": -1}, "skip": skip}
+
+
+def test_slow_commands_are_grouped_by_shape():
+    log = server.SlowQueryLog(threshold_ms=100, max_shapes=10)
+    send(log, find("published"), 500, request_id=1)
+    send(log, find("draft"), 300, request_id=2)
+    send(log, find("draft"), 5, request_id=3)
+    send(log, {"aggregate": "comments", "pipeline": [{"$match": {"news_id": "x"}}], "cursor": {}}, 150, request_id=4, failed=True)
+
+    find_entry, aggregate_entry = log.top(10, "total_ms")
+    assert (find_entry["command"], find_entry["collection"]) == ("find", "news")
+    assert find_entry["filter"] == {"status": "?"} and find_entry["sort"] == {"created_at": -1}
+    assert (find_entry["count"], find_entry["max_ms"], find_entry["mean_ms"]) == (2, 500, 400)
+    assert (aggregate_entry["collection"], aggregate_entry["pipeline"]) == ("comments", ["$match"])
+    assert log.pending == {}
+
+
+def test_other_commands_are_ignored():
+    log = server.SlowQueryLog(threshold_ms=100, max_shapes=10)
+    send(log, {"insert": "news", "documents": [{}]}, 500)
+    send(log, {"ping": 1}, 500, request_id=2)
+    assert log.entries == {}
+
+
+def test_least_costly_shape_is_evicted():
+    log = server.SlowQueryLog(threshold_ms=100, max_shapes=2)
+    send(log, {"find": "news", "filter": {"a": 1}}, 900, request_id=1)
+    send(log, {"find": "news", "filter": {"b": 1}}, 200, request_id=2)
+    send(log, {"find": "news", "filter": {"c": 1}}, 400, request_id=3)
+    assert [entry["filter"] for entry in log.top(10, "total_ms")] == [{"a": "?"}, {"c": "?"}]
+
+
+def test_explain_runs_against_the_command_database(run, monkeypatch):
+    calls = []
+
+    class Database:
+        def __init__(self, name):
+            self.name = name
+
+        async def command(self, command):
+            calls.append((self.name, command))
+            return {"queryPlanner": {"winningPlan": {
+                "stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "status_1"}},
+            }}}
+
+    monkeypatch.setattr(server, "client", {"school": Database("school")})
+    entry = {}
+    run(server.slow_query_log.capture_explain(entry, "school", {**find("x"), "lsid": {"id": 1}, "$db": "school"}))
+
+    database, command = calls[0]
+    assert database == "school"
+    assert command["explain"] == find("x")
+    assert entry["plan"] == "LIMIT > FETCH > IXSCAN status_1"
+
+
+def test_endpoint_lists_and_clears(client, admin):
+    server.slow_query_log.clear()
+    send(server.slow_query_log, find("published"), 250, request_id=99)
+
+    response = client.get("/api/debug/slow-queries", headers=admin).json()
+    assert response["shapes"] == 1
+    assert response["queries"][0]["collection"] == "news"
+
+    client.delete("/api/debug/slow-queries", headers=admin)
+    assert client.get("/api/debug/slow-queries", headers=admin).json()["queries"] == []
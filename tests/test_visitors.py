@@ -0,0 +1,62 @@
+"""Unique visitor sketches: estimates, merges into daily rollups and the stats endpoint."""
+import asyncio
+from datetime import datetime
+
+import server
+
+
+def sketch_of(values):
+    sketch = server.HyperLogLog()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_estimate_is_within_error():
+    sketch = sketch_of(f"visitor-{i}" for i in range(20000))
+    assert abs(sketch.estimate() - 20000) < 20000 * sketch.standard_error * 3
+
+
+def test_merge_is_a_union():
+    merged = sketch_of(f"v{i}" for i in range(0, 3000))
+    merged.merge(sketch_of(f"v{i}" for i in range(2000, 5000)))
+    assert abs(merged.estimate() - 5000) < 5000 * merged.standard_error * 3
+
+
+def test_merge_into_rollup_without_version(db, run):
+    day = server.visit_day(datetime.utcnow())
+    # Rollups written before sketches existed have no hll_version field
+    run(db.visit_rollups.insert_one({"_id": day, "date": datetime.strptime(day, "%Y-%m-%d"), "total": 5}))
+
+    run(server.merge_visitor_sketch(day, sketch_of(str(i) for i in range(100))))
+
+    rollup = run(db.visit_rollups.find_one({"_id": day}))
+    assert rollup["hll_version"] == 1
+    assert server.HyperLogLog(registers=rollup["hll"]).estimate() == 100
+
+
+def test_concurrent_merges_are_both_kept(db, run):
+    day = server.visit_day(datetime.utcnow())
+
+    async def merge_both():
+        await db.visit_rollups.insert_one({"_id": day, "date": datetime.strptime(day, "%Y-%m-%d"), "hll_version": 0})
+        await asyncio.gather(
+            server.merge_visitor_sketch(day, sketch_of(f"a{i}" for i in range(300))),
+            server.merge_visitor_sketch(day, sketch_of(f"b{i}" for i in range(300))),
+        )
+        return await db.visit_rollups.find_one({"_id": day})
+
+    rollup = run(merge_both())
+    assert rollup["hll_version"] == 2
+    assert abs(server.HyperLogLog(registers=rollup["hll"]).estimate() - 600) < 20
+
+
+def test_tracked_visits_reach_stats(client, admin, run):
+    for i in range(40):
+        client.post("/api/track", json={"path": "/", "visitor_id": f"visitor-{i % 10}"})
+    run(server.flush_visits())
+
+    stats = client.get("/api/stats", headers=admin).json()
+    assert stats["total_visits"] == 40
+    assert stats["daily_visits"] == 40
+    assert stats["unique_visitors_daily"] == stats["unique_visitors_monthly"] == 10